@@ -6,38 +6,516 @@
 
 from __future__ import print_function
 
+import Queue
+import calendar
 import datetime
-import dateutil.parser
-import dateutil.tz
 import json
-import urllib
+import os
+import threading
+import time
+
+import cache
+import httpclient
+import metrics
+import playbacks
+import resilience
 
 FANART_SIZE = 1920
 THUMB_SIZE = 960
 ICON_SIZE = 640
 
+# parallel queries and time limit (seconds) for GameDay.prefetch_highlights()
+PREFETCH_WORKERS = 4
+PREFETCH_TIME_BUDGET = 20
+
+API_URL = "https://statsapi.mlb.com/api/v1"
+
+# Hydrations and field filters, so the API only returns what the views use.
+# If the API rejects a field filter, the query is repeated without it; if it
+# ignores a filter, the additional data is not used.
+SCHEDULE_HYDRATE = "game(content(editorial(recap))),linescore,team"
+GAME_HYDRATE = "game(content(editorial(recap),highlights(highlights))),linescore,team"
+GAME_FIELDS = ("gamePk,gameDate,status,abstractGameState,"
+               "teams,away,home,team,id,name,abbreviation,"
+               "content,editorial,recap,mlb,headline,blurb,image,cuts,width,src,"
+               "linescore,runs")
+HIGHLIGHT_FIELDS = ("highlights,items,id,date,slug,title,description,blurb,duration,"
+                    "image,cuts,width,src,playbacks,name,url")
+SCHEDULE_FIELDS = "dates,date,games," + GAME_FIELDS
+SCHEDULE_INDEX_FIELDS = "dates,date,games,gamePk,teams,away,home,team,id"
+
+# cache lifetimes (seconds) for the different kinds of API responses
+TTL_LIVE = 5 * 60                 # today's / yesterday's schedules and game content
+TTL_SEASON = 7 * 24 * 60 * 60     # seasons, teams
+TTL_FINAL = 30 * 24 * 60 * 60     # schedules and content of finished past dates
+# expired responses younger than this (beyond their TTL) are used while
+# they are revalidated in the background
+STALE_WHILE_REVALIDATE = 60 * 60
+
+# request timeouts (seconds) per endpoint
+TIMEOUTS = {"schedule": 10, "content": 10, "seasons": 5, "teams": 5}
+DEFAULT_TIMEOUT = 10
+# time limit (seconds) for all attempts of a query together
+QUERY_DEADLINE = 15
+
+# Schedules and game content are cached as Game / Highlight records (see
+# to_record()) instead of API responses. Increase when the record layout changes.
+RECORDS_VERSION = 3
+
+_cache = None
+_breaker = resilience.CircuitBreaker()
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+def set_cache_dir(path, max_bytes=cache.DEFAULT_MAX_BYTES):
+    """
+    Enable the on-disk response cache.
+
+    :param path: directory for the cache files (e.g. below the addon profile)
+    :type path: str
+    :param max_bytes: size limit of the cache
+    :type max_bytes: int
+    """
+    global _cache, _breaker
+    _cache = cache.Cache(path, max_bytes)
+    _breaker = resilience.CircuitBreaker(state_file=os.path.join(path, "circuit-breaker"))
+
+
+def is_final(date):
+    """
+    Whether the games of a date are finished and their data will not change
+    anymore. Games of yesterday may still be running (or be updated with
+    new highlights) after midnight.
+    """
+    return date < datetime.date.today() - datetime.timedelta(1)
+
+
+def date_ttl(date):
+    """
+    Cache lifetime for data belonging to a date.
+    """
+    if is_final(date):
+        return TTL_FINAL
+    else:
+        return TTL_LIVE
+
+
+def endpoint_name(url):
+    """
+    :return: API endpoint of a query URL (a key of TIMEOUTS), "other" if unknown
+    """
+    path = url[len(API_URL):].split("?")[0]
+    for endpoint in TIMEOUTS:
+        if path.endswith("/" + endpoint):
+            return endpoint
+    return "other"
+
+
+def get_timeout(url):
+    return TIMEOUTS.get(endpoint_name(url), DEFAULT_TIMEOUT)
+
+
+def request_timeout(url, deadline):
+    """
+    Timeout of a request, shortened to the time left until the deadline
+    of the query (at least 1 s).
+    """
+    return max(1, min(get_timeout(url), deadline - time.time()))
+
+
+def is_retryable(error):
+    # client errors (4xx) will not go away with a retry
+    return not (isinstance(error, httpclient.HttpError) and error.status < 500)
+
+
+def query(url, fields=None, validators=None, retries=resilience.RETRIES):
+    """
+    Query the API, conditionally if validators of a cached response are given.
+    Failed requests are retried until QUERY_DEADLINE; after repeated failures
+    the circuit breaker rejects all queries for a while.
+
+    :param url: query URL
+    :type url: str
+    :param fields: comma-separated field filter, see the *_FIELDS constants
+    :type fields: str
+    :param validators: "etag" / "last_modified" of a cached response
+    :type validators: dict
+    :param retries: maximum number of retries
+    :type retries: int
+    :return: decoded JSON response (None if not modified) and its validators
+    :rtype: tuple
+    :raises IOError: if the API could not be reached (resilience.CircuitOpenError
+        if the circuit breaker is open)
+    """
+    _breaker.check()
+    deadline = time.time() + QUERY_DEADLINE
+    try:
+        result = resilience.call_with_retries(lambda: _query(url, fields, validators, deadline), retries,
+                                              is_retryable=is_retryable, deadline=deadline)
+    except (IOError, ValueError) as e:
+        if is_retryable(e):
+            _breaker.failure()
+        raise
+    _breaker.success()
+    return result
+
+
+def _query(url, fields, validators, deadline):
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    client = httpclient.get_client()
+    scope = "endpoint:" + endpoint_name(url)
+    start = time.time()
+    if fields is not None:
+        separator = "&" if "?" in url else "?"
+        response = client.get("{0}{1}fields={2}".format(url, separator, fields), headers,
+                              request_timeout(url, deadline))
+        if response.status == 400:
+            # filter not accepted, fall back to the complete response
+            response = client.get(url, headers, request_timeout(url, deadline))
+    else:
+        response = client.get(url, headers, request_timeout(url, deadline))
+    metrics.observe(scope, "latency", time.time() - start)
+    metrics.count(scope, "requests")
+
+    if response.status == 304 and validators:
+        metrics.count(scope, "not_modified")
+        return None, validators
+    if response.status != 200:
+        raise httpclient.HttpError(response.status, url)
+    response_validators = {"etag": response.headers.get("etag"),
+                           "last_modified": response.headers.get("last-modified")}
+    metrics.count(scope, "bytes", len(response.body))
+    start = time.time()
+    data = decode_json(response.body, fields)
+    metrics.observe(scope, "parse", time.time() - start)
+    return data, response_validators
+
+
+def query_json(url, fields=None, retries=resilience.RETRIES):
+    """
+    Query the API, see query().
+
+    :return: decoded JSON response
+    """
+    return query(url, fields, retries=retries)[0]
+
+
+def decode_json(body, fields=None):
+    """
+    Decode an API response. With a field filter, all object members not
+    named in it are dropped while decoding, in the same way as the API does
+    for the fields= parameter. Used when the API ignores the filter, so
+    unused parts of a response are neither cached nor kept in memory, and
+    no pruned copy of the complete response is built.
+
+    :param body: JSON response body
+    :type body: str
+    :param fields: comma-separated field filter (or a set of field names)
+    :type fields: str
+    """
+    if fields is None:
+        return json.loads(body)
+    if isinstance(fields, basestring):
+        fields = frozenset(fields.split(","))
+    return json.loads(body, object_pairs_hook=lambda pairs: dict([p for p in pairs if p[0] in fields]))
+
+
+def records_key(url):
+    """
+    Cache key for the records built from an API response.
+    """
+    return "{0}#records-{1}".format(url, RECORDS_VERSION)
+
+
+def get_json(url, ttl, refresh=False, fields=None, transform=None):
+    """
+    Get an API response from the cache, or query it if it is missing or
+    expired. Expired responses are revalidated with a conditional request;
+    if the API reports them unchanged (304), the cached data is used again.
+    Responses expired for less than STALE_WHILE_REVALIDATE are returned
+    right away and revalidated in the background. Older responses are
+    revalidated without retries; if the API cannot be reached, they are
+    used regardless of their age and revalidated in the background.
+
+    :param url: query URL (also the cache key)
+    :type url: str
+    :param ttl: maximum age of a cached response in seconds, None for no limit
+    :type ttl: int
+    :param refresh: revalidate even if the cached response is not expired
+    :type refresh: bool
+    :param fields: comma-separated field filter, see query()
+    :type fields: str
+    :param transform: function converting the decoded response (e.g. into
+        records) before it is cached and returned, called with the response
+        and the previously cached result (None if there is none)
+    :return: decoded JSON response, or the result of transform
+    """
+    if _cache is None:
+        data = query_json(url, fields)
+        return transform(data, None) if transform is not None else data
+
+    key = records_key(url) if transform is not None else url
+    scope = "endpoint:" + endpoint_name(url)
+    with metrics.timer(scope, "cache_read"):
+        entry = _cache.get_entry(key)
+    if entry is not None and not refresh:
+        age = time.time() - entry.time
+        if ttl is None or age <= ttl:
+            metrics.count(scope, "cache_hit")
+            return entry.data
+        if age <= ttl + STALE_WHILE_REVALIDATE:
+            metrics.count(scope, "cache_stale")
+            revalidate_in_background(url, key, fields, transform, entry)
+            return entry.data
+
+    metrics.count(scope, "cache_miss")
+    # with a cached response to fall back to, do not wait for retries
+    retries = 0 if entry is not None else resilience.RETRIES
+    try:
+        return revalidate(url, key, fields, transform, entry, retries)
+    except (IOError, ValueError) as e:
+        if entry is not None:
+            metrics.count(scope, "cache_fallback")
+            if is_retryable(e):
+                revalidate_in_background(url, key, fields, transform, entry)
+            return entry.data
+        raise
+
+
+def revalidate(url, key, fields, transform, entry, retries=resilience.RETRIES):
+    validators = entry.validators if entry is not None else None
+    (data, validators) = query(url, fields, validators, retries)
+    if data is None:
+        _cache.touch(key)
+        return entry.data
+
+    if transform is not None:
+        with metrics.timer("endpoint:" + endpoint_name(url), "convert"):
+            data = transform(data, entry.data if entry is not None else None)
+    _cache.put(key, data, validators)
+    return data
+
+
+def revalidate_in_background(url, key, fields, transform, entry):
+    run_in_background(key, lambda: revalidate(url, key, fields, transform, entry))
+
+
+def run_in_background(key, func):
+    """
+    Update cached data in a thread, unless an update of the same cache
+    key is already running. Failures are ignored, the cached data is used
+    until a later update succeeds.
+
+    :param key: cache key of the updated data
+    :type key: str
+    :param func: function without arguments doing the update
+    """
+    with _revalidating_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            func()
+        except (IOError, ValueError):
+            pass
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(key)
+
+    # not a daemon thread: the plugin process waits for the update to finish
+    threading.Thread(target=run).start()
+
+
+def schedule_url(date_start, date_end):
+    return "{0}/schedule?sportId=1&startDate={1}&endDate={2}&gameType=R&hydrate={3}".format(
+        API_URL, date_start, date_end, SCHEDULE_HYDRATE)
+
+
+def game_url(game_id):
+    return "{0}/schedule?sportId=1&gamePk={1}&hydrate={2}".format(API_URL, game_id, GAME_HYDRATE)
+
+
+def get_image_urls(base_json, max_sizes):
+    """
+    For each size, the URL of the first image cut not wider than the size.
+    All sizes are resolved in a single pass over the cuts.
 
-def get_image_url(base_json, max_size):
+    :param base_json: JSON object with an "image" member
+    :param max_sizes: maximum widths
+    :type max_sizes: tuple of int
+    :return: URLs (or None) in the order of max_sizes
+    :rtype: tuple
+    """
+    urls = [None] * len(max_sizes)
     try:
         cuts_json = base_json["image"]["cuts"]
+    except (KeyError, TypeError):
+        return tuple(urls)
+
+    missing = len(max_sizes)
+    for c in cuts_json:
+        for (i, max_size) in enumerate(max_sizes):
+            if urls[i] is None and c["width"] <= max_size:
+                urls[i] = c["src"]
+                missing -= 1
+        if missing == 0:
+            break
+    return tuple(urls)
+
+
+def get_playback_url(highlight_json):
+    try:
+        for playback in highlight_json["playbacks"]:
+            if playback["name"] == "mp4Avc" or playback["name"] == "FLASH_2500K_1280X720":
+                return playback["url"]
     except KeyError:
-        cuts_json = None
-    if cuts_json is not None:
+        pass
+    return None
+
+
+def get_content_type(highlight_json):
+    """
+    :return: "C" for condensed game, "R" for recap, "H" for all other highlights
+    """
+    slug = highlight_json.get("slug", "")
+    if slug.startswith("cg-"):
+        return "C"
+    elif slug.startswith("recap-"):
+        return "R"
+    else:
+        return "H"
+
+
+def highlight_order(highlights_json):
+    """
+    Order of the playable highlights: condensed game, recap, then all other
+    highlights as listed by the API. Only the raw items are inspected, so no
+    Highlight has to be created for sorting.
+
+    :return: indices into highlights_json
+    :rtype: list of int
+    """
+    playable = [i for (i, h) in enumerate(highlights_json) if get_playback_url(h) is not None]
+    front = []
+    for content_type in ("C", "R"):
         try:
-            return next(c["src"] for c in cuts_json if c["width"] <= max_size)
+            front.append(next(i for i in playable if get_content_type(highlights_json[i]) == content_type))
         except StopIteration:
-            return None
-    else:
-        return None
+            pass
+    return front + [i for i in playable if i not in front]
+
+
+# Parsers for the fixed date / time formats of the API. dateutil is only
+# imported (which takes a noticeable part of the plugin start) for
+# unexpected formats. Repeated values are looked up in a cache.
+PARSE_CACHE_SIZE = 10000
+
+
+class UTC(datetime.tzinfo):
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return "UTC"
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+
+utc = UTC()
+
+_duration_cache = {}
+_datetime_cache = {}
+
+
+def _cache_value(parse_cache, key, value):
+    if len(parse_cache) >= PARSE_CACHE_SIZE:
+        parse_cache.clear()
+    parse_cache[key] = value
+    return value
+
+
+def parse_date(date_string):
+    """
+    Parse a date like "2019-04-15".
+
+    :rtype: datetime.date
+    """
+    if len(date_string) == 10 and date_string[4] == "-" and date_string[7] == "-":
+        try:
+            return datetime.date(int(date_string[0:4]), int(date_string[5:7]), int(date_string[8:10]))
+        except ValueError:
+            pass
+    import dateutil.parser
+    return dateutil.parser.parse(date_string).date()
+
+
+def parse_datetime(datetime_string):
+    """
+    Parse a UTC time stamp like "2019-04-15T17:05:00Z".
+
+    :rtype: datetime.datetime
+    """
+    try:
+        return _datetime_cache[datetime_string]
+    except KeyError:
+        pass
+
+    s = datetime_string
+    if len(s) == 20 and s[10] == "T" and s[19] == "Z":
+        try:
+            return _cache_value(_datetime_cache, s, datetime.datetime(
+                int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:19]), tzinfo=utc))
+        except ValueError:
+            pass
+    import dateutil.parser
+    return _cache_value(_datetime_cache, s, dateutil.parser.parse(s))
+
+
+def to_local_time(dt):
+    """
+    :param dt: time stamp with time zone
+    :type dt: datetime.datetime
+    :return: local time (without time zone)
+    :rtype: datetime.datetime
+    """
+    return datetime.datetime.fromtimestamp(calendar.timegm(dt.utctimetuple()))
 
 
 def convert_duration(duration_string):
-    time = dateutil.parser.parse(duration_string).time()
-    td = datetime.timedelta(hours=time.hour, minutes=time.minute, seconds=time.second)
-    return int(td.total_seconds())
+    """
+    Convert a duration like "00:01:23" to seconds.
 
+    :rtype: int
+    """
+    try:
+        return _duration_cache[duration_string]
+    except KeyError:
+        pass
+
+    parts = duration_string.split(":")
+    if len(parts) == 3 and all(p.isdigit() for p in parts):
+        seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+    else:
+        import dateutil.parser
+        time = dateutil.parser.parse(duration_string).time()
+        seconds = time.hour * 3600 + time.minute * 60 + time.second
+    return _cache_value(_duration_cache, duration_string, seconds)
 
-class Highlight:
+
+ART_SIZES = (FANART_SIZE, THUMB_SIZE, ICON_SIZE)
+
+
+class Highlight(object):
     # members:
     # - url
     # - title
@@ -48,51 +526,87 @@ class Highlight:
     # - description
     # - description_short
     # - duration
+    # - playbacks (all renditions, see playbacks.parse_playbacks(), None if unknown)
+    # - id
+    # - date (time stamp of the last change, as in the API)
+    # Artwork and duration are only resolved when accessed, most highlights
+    # of a season are never displayed.
+    __slots__ = ("url", "title", "contentType", "description", "description_short", "playbacks", "id", "date",
+                 "_duration", "_duration_str", "_image_json", "_art")
+
     def __init__(self, highlight_json):
-        self.url = None
-        try:
-            for playback in highlight_json["playbacks"]:
-                if playback["name"] == "mp4Avc":
-                    self.url = playback["url"]
-                    break
-                elif playback["name"] == "FLASH_2500K_1280X720":
-                    self.url = playback["url"]
-                    break
-        except KeyError:
-            return
+        self.id = highlight_json.get("id")
+        self.date = highlight_json.get("date")
+        self.url = get_playback_url(highlight_json)
+        self.playbacks = playbacks.parse_playbacks(highlight_json)
+        self.title = highlight_json.get("title", "")
+        self.description = highlight_json.get("description", "")
+        self.description_short = highlight_json.get("blurb", "")
+        self.contentType = get_content_type(highlight_json)
 
-        try:
-            self.title = highlight_json["title"]
-        except KeyError:
-            self.title = ""
+        self._duration = None
+        self._duration_str = highlight_json.get("duration")
+        self._image_json = highlight_json.get("image")
+        self._art = None
 
-        try:
-            self.description = highlight_json["description"]
-        except KeyError:
-            self.description = ""
+    @property
+    def duration(self):
+        if self._duration is None:
+            if self._duration_str is not None:
+                self._duration = convert_duration(self._duration_str)
+            else:
+                self._duration = 0
+        return self._duration
 
-        try:
-            self.description_short = highlight_json["blurb"]
-        except KeyError:
-            self.description_short = ""
+    def _get_art(self):
+        if self._art is None:
+            self._art = get_image_urls({"image": self._image_json}, ART_SIZES)
+            self._image_json = None
+        return self._art
 
-        try:
-            self.duration = convert_duration(highlight_json["duration"])
-        except KeyError:
-            self.duration = 0
+    @property
+    def fanart(self):
+        return self._get_art()[0]
 
-        self.fanart = get_image_url(highlight_json, FANART_SIZE)
-        self.thumb = get_image_url(highlight_json, THUMB_SIZE)
-        self.icon = get_image_url(highlight_json, ICON_SIZE)
+    @property
+    def thumb(self):
+        return self._get_art()[1]
 
-        self.contentType = "H"
-        try:
-            if highlight_json["slug"].startswith("cg-"):
-                self.contentType = "C"
-            elif highlight_json["slug"].startswith("recap-"):
-                self.contentType = "R"
-        except KeyError:
-            pass
+    @property
+    def icon(self):
+        return self._get_art()[2]
+
+    def select_url(self, max_bitrate=None, throughput=None, prefer_adaptive=False):
+        """
+        URL of the rendition to play, see playbacks.select_rendition().
+        """
+        rendition = playbacks.select_rendition(self.playbacks or [], max_bitrate, throughput, prefer_adaptive)
+        if rendition is not None:
+            return rendition[0]
+        return self.url
+
+    def to_record(self):
+        """
+        Compact form of the highlight for the cache, with artwork and
+        duration resolved.
+
+        :rtype: tuple
+        """
+        return (self.url, self.title, self.contentType, self.description, self.description_short,
+                self.duration, self._get_art(), self.playbacks, self.id, self.date)
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Restore a highlight stored with to_record().
+        """
+        highlight = cls.__new__(cls)
+        (highlight.url, highlight.title, highlight.contentType, highlight.description,
+         highlight.description_short, highlight._duration, highlight._art, highlight.playbacks,
+         highlight.id, highlight.date) = record
+        highlight._duration_str = None
+        highlight._image_json = None
+        return highlight
 
     def __unicode__(self):
         return u"{0}: {1}\nurl: {2}\nthumb: {3}".format(self.contentType, self.title, self.url, self.thumb)
@@ -101,44 +615,57 @@ class Highlight:
         return unicode(self).encode('utf-8')
 
 
-class Game:
-    def __init__(self, game_desc):
-        # members:
-        # - gameid
-        # - datetime
-        # - title
-        # - title_short
-        # - fanart
-        # - thumb
-        # - icon
-        # - description
-        # - description_short
-        # - highlights
+class Game(object):
+    # members:
+    # - gameid
+    # - datetime
+    # - date (gameday, if known from the listing of the game)
+    # - title
+    # - title_short
+    # - title_time
+    # - fanart
+    # - thumb
+    # - icon
+    # - description
+    # - description_short
+    # - highlights
+    # - highlights_json (highlight items included in the schedule data, if any)
+    # - state ("Preview", "Live" or "Final")
+    # Artwork and title_time are only resolved when accessed.
+    __slots__ = ("gameId", "datetime", "date", "title", "title_short", "description", "description_short",
+                 "highlights", "highlights_json", "scores", "state", "_image_json", "_art")
+
+    def __init__(self, game_desc, title_short=None, date=None):
         self.gameId = None
 
         self.datetime = None
+        self.date = date
         self.title = None
         self.title_short = None
-        self.title_time = None
 
-        self.fanart = None
-        self.thumb = None
-        self.icon = None
+        self._image_json = None
+        self._art = None
         self.description = None
         self.description_short = None
 
         self.highlights = []
+        self.highlights_json = None
         self.scores = None
+        self.state = None
 
         game_json = None
         if type(game_desc) == str or type(game_desc) == int:
             self.gameId = game_desc
-            game_query_url = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&gamePk={0}&hydrate=game(content(all)),linescore,team".format(game_desc)
-            response = urllib.urlopen(game_query_url)
-            data = json.loads(response.read())
+            if title_short is not None:
+                # title (and date, for the cache lifetime of the highlights) known
+                # from the parent listing, the highlights are queried separately
+                # by get_highlights()
+                self.title_short = title_short
+                return
+            data = get_json(game_url(game_desc), TTL_LIVE, fields=SCHEDULE_FIELDS + "," + HIGHLIGHT_FIELDS)
             try:
                 game_json = data["dates"][0]["games"][0]
-            except KeyError:
+            except (KeyError, IndexError):
                 pass
         elif type(game_desc) == dict:
             try:
@@ -150,23 +677,28 @@ class Game:
             return
 
         try:
-            self.datetime = dateutil.parser.parse(game_json["gameDate"])
-            game_time_str = self.datetime.astimezone(dateutil.tz.tzlocal()).strftime("%Y-%m-%d %H:%M")
+            self.datetime = parse_datetime(game_json["gameDate"])
         except KeyError:
-            game_time_str = ""
+            pass
 
-        team_names = ["{0} ({1})".format(game_json["teams"][ha]["team"]["name"],
-                                         game_json["teams"][ha]["team"]["abbreviation"]) for ha in ("away", "home")]
-        self.title = "{0} @ {1}".format(team_names[0], team_names[1])
-        self.title_short = "{0} @ {1}".format(game_json["teams"]["away"]["team"]["abbreviation"],
-                                              game_json["teams"]["home"]["team"]["abbreviation"])
-        self.title_time = "{0} — {1}".format(game_time_str, self.title_short)
+        try:
+            team_names = ["{0} ({1})".format(game_json["teams"][ha]["team"]["name"],
+                                             game_json["teams"][ha]["team"]["abbreviation"]) for ha in ("away", "home")]
+            self.title = "{0} @ {1}".format(team_names[0], team_names[1])
+            self.title_short = "{0} @ {1}".format(game_json["teams"]["away"]["team"]["abbreviation"],
+                                                  game_json["teams"]["home"]["team"]["abbreviation"])
+        except KeyError:
+            # without teams the game cannot be listed
+            return
+
+        try:
+            self.state = game_json["status"]["abstractGameState"]
+        except KeyError:
+            pass
 
         try:
             recap_json = game_json["content"]["editorial"]["recap"]["mlb"]
-            self.fanart = get_image_url(recap_json, FANART_SIZE)
-            self.thumb = get_image_url(recap_json, THUMB_SIZE)
-            self.icon = get_image_url(recap_json, ICON_SIZE)
+            self._image_json = recap_json.get("image")
             self.description = recap_json["blurb"]
             self.description_short = recap_json["headline"]
         except KeyError:
@@ -178,31 +710,111 @@ class Game:
         except KeyError:
             pass
 
-
-    def get_highlights(self):
-        highlights_query_url = "https://statsapi.mlb.com/api/v1/game/{0}/content".format(self.gameId)
-        response = urllib.urlopen(highlights_query_url)
-        data = json.loads(response.read())
-        
-        try:            
-            highlights_json = data["highlights"]["highlights"]["items"]
+        # the schedule of a single game contains the highlights, keep them
+        # so get_highlights() does not need another query
+        try:
+            self.highlights_json = game_json["content"]["highlights"]["highlights"]["items"]
         except KeyError:
-            highlights_json = None
+            pass
 
-        if highlights_json is not None:
-            self.highlights = [Highlight(h) for h in highlights_json]
-            self.highlights = [h for h in self.highlights if h.url is not None]
+    @property
+    def title_time(self):
+        if self.title_short is None:
+            return None
+        if self.datetime is not None:
+            game_time_str = to_local_time(self.datetime).strftime("%Y-%m-%d %H:%M")
         else:
-            self.highlights = []
+            game_time_str = ""
+        return "{0} — {1}".format(game_time_str, self.title_short)
 
-        # move recap, condensed game to front
-        try:
-            hl_recap = next(hl for hl in self.highlights if hl.contentType == "R")
-            self.highlights.insert(0, self.highlights.pop(self.highlights.index(hl_recap)))
-            hl_cond = next(hl for hl in self.highlights if hl.contentType == "C")
-            self.highlights.insert(0, self.highlights.pop(self.highlights.index(hl_cond)))
-        except StopIteration:
-            pass
+    def _get_art(self):
+        if self._art is None:
+            self._art = get_image_urls({"image": self._image_json}, ART_SIZES)
+            self._image_json = None
+        return self._art
+
+    @property
+    def fanart(self):
+        return self._get_art()[0]
+
+    @property
+    def thumb(self):
+        return self._get_art()[1]
+
+    @property
+    def icon(self):
+        return self._get_art()[2]
+
+    def to_record(self):
+        """
+        Compact form of the game for the cache, with artwork resolved.
+        Highlights are not included.
+
+        :rtype: tuple
+        """
+        timestamp = calendar.timegm(self.datetime.utctimetuple()) if self.datetime is not None else None
+        return (self.gameId, timestamp, self.title, self.title_short, self.description, self.description_short,
+                self.scores, self.state, self._get_art())
+
+    @classmethod
+    def from_record(cls, record):
+        """
+        Restore a game stored with to_record().
+        """
+        game = cls.__new__(cls)
+        (game.gameId, timestamp, game.title, game.title_short, game.description, game.description_short,
+         game.scores, game.state, game._art) = record
+        game.datetime = datetime.datetime.fromtimestamp(timestamp, utc) if timestamp is not None else None
+        game.date = None
+        game.highlights = []
+        game.highlights_json = None
+        game._image_json = None
+        return game
+
+    def content_url(self):
+        return "{0}/game/{1}/content".format(API_URL, self.gameId)
+
+    def get_date(self):
+        """
+        :return: the gameday if known, otherwise the (UTC) date of the game
+            time, None if neither is known
+        :rtype: datetime.date
+        """
+        if self.date is not None:
+            return self.date
+        elif self.datetime is not None:
+            return self.datetime.date()
+        else:
+            return None
+
+    def content_ttl(self):
+        date = self.get_date()
+        if date is not None:
+            return date_ttl(date)
+        else:
+            return TTL_LIVE
+
+    def query_highlight_records(self, refresh=False):
+        """
+        :return: records of the playable highlights, see content_records()
+        :rtype: list of tuple
+        """
+        return get_json(self.content_url(), self.content_ttl(), refresh, HIGHLIGHT_FIELDS, content_records)
+
+    def iter_highlights(self, refresh=False):
+        """
+        Playable highlights, condensed game and recap first. The Highlight
+        objects are created one at a time as the generator is consumed.
+        """
+        if self.highlights_json is not None:
+            for i in highlight_order(self.highlights_json):
+                yield Highlight(self.highlights_json[i])
+        else:
+            for record in self.query_highlight_records(refresh):
+                yield Highlight.from_record(record)
+
+    def get_highlights(self, refresh=False):
+        self.highlights = list(self.iter_highlights(refresh))
 
     def __unicode__(self):
         x = u"--- {0}".format(self.title)
@@ -213,28 +825,170 @@ class Game:
     def __str__(self):
         return unicode(self).encode('utf-8')
 
-    
+
+def highlight_records(highlights_json, previous=None):
+    """
+    Records of the playable highlights, condensed game and recap first.
+    Records of highlights which are unchanged since the previous records
+    (same id and date) are reused, so while a game is running only the
+    new highlights are converted.
+
+    :param highlights_json: highlight items of the game content
+    :type highlights_json: list
+    :param previous: highlight records of an earlier version of the content
+    :type previous: list of tuple
+    :rtype: list of tuple
+    """
+    known = {}
+    for record in previous or []:
+        known[(record[8], record[9])] = record
+
+    records = []
+    built = 0
+    for highlight_json in highlights_json:
+        record = None
+        if highlight_json.get("id") is not None:
+            record = known.get((highlight_json["id"], highlight_json.get("date")))
+        if record is None:
+            if get_playback_url(highlight_json) is None:
+                continue
+            record = Highlight(highlight_json).to_record()
+            built += 1
+        records.append(record)
+    metrics.count("objects", "highlights_built", built)
+    metrics.count("objects", "highlights_reused", len(records) - built)
+    return order_records(records)
+
+
+def order_records(records):
+    """
+    Move the first condensed game and the first recap to the front, see
+    highlight_order().
+    """
+    front = []
+    for content_type in ("C", "R"):
+        for (i, record) in enumerate(records):
+            if record[2] == content_type:
+                front.append(i)
+                break
+    return [records[i] for i in front] + [r for (i, r) in enumerate(records) if i not in front]
+
+
+def content_records(content_json, previous=None):
+    """
+    Convert game content into highlight records, see highlight_records().
+    """
+    try:
+        return highlight_records(content_json["highlights"]["highlights"]["items"], previous)
+    except KeyError:
+        return []
+
+
+def game_records(schedule_json, previous=None):
+    """
+    Convert the schedule of a single day into game records.
+
+    :rtype: list of tuple
+    """
+    try:
+        games_json = schedule_json["dates"][0]["games"]
+    except (KeyError, IndexError):
+        return []
+    metrics.count("objects", "games_built", len(games_json))
+    return [Game(game_json).to_record() for game_json in games_json]
+
+
+def seen_highlights_key(game_id):
+    return "seen-highlights:{0}".format(game_id)
+
+
+def get_seen_highlights(game_id):
+    """
+    Ids of the highlights of a game shown last time, see set_seen_highlights().
+
+    :return: highlight ids, None if the game was not shown before
+    :rtype: set
+    """
+    if _cache is None:
+        return None
+    ids = _cache.get(seen_highlights_key(game_id), None)
+    return set(ids) if ids is not None else None
+
+
+def set_seen_highlights(game_id, ids):
+    """
+    Remember the highlights of a game shown to the user, so highlights
+    added later can be marked as new.
+    """
+    if _cache is not None:
+        _cache.put(seen_highlights_key(game_id), list(ids))
+
+
+def prefetch_highlights(games, max_workers=PREFETCH_WORKERS, time_budget=PREFETCH_TIME_BUDGET, cancel=None,
+                        refresh=False):
+    """
+    Query the highlights of games in parallel and store them in the games
+    (and in the cache), so opening a game folder later is served without
+    waiting for the API.
+
+    :param games: games to query the highlights for
+    :type games: list
+    :param max_workers: maximum number of parallel queries
+    :type max_workers: int
+    :param time_budget: seconds after which unfinished queries are abandoned
+    :type time_budget: float
+    :param cancel: event to stop the prefetch early
+    :type cancel: threading.Event
+    :param refresh: bypass cached responses
+    :type refresh: bool
+    """
+    deadline = time.time() + time_budget
+    if cancel is None:
+        cancel = threading.Event()
+    pending = Queue.Queue()
+    for game in games:
+        pending.put(game)
+
+    def worker():
+        while not cancel.is_set() and time.time() < deadline:
+            try:
+                game = pending.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                game.get_highlights(refresh)
+            except (IOError, ValueError):
+                pass
+
+    workers = [threading.Thread(target=worker) for _ in range(min(max_workers, len(games)))]
+    for w in workers:
+        # abandoned workers must not keep the plugin alive
+        w.daemon = True
+        w.start()
+    for w in workers:
+        w.join(max(0, deadline - time.time()))
+
+
 class GameDay:
     # members:
     # - date
     # - games
-    def __init__(self, date):
+    def __init__(self, date, refresh=False, records=None):
         self.date = date
 
-        query_url = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&startDate={0}&endDate={0}&gameType=R&hydrate=game(content(all)),linescore,team".format(
-            self.date)
-        response = urllib.urlopen(query_url)
-        data = json.loads(response.read())
+        if records is None:
+            records = get_json(schedule_url(self.date, self.date), date_ttl(self.date), refresh, SCHEDULE_FIELDS,
+                               game_records)
 
-        try:
-            games_json = data["dates"][0]["games"]
-        except (KeyError, IndexError), _:
-            games_json = None
+        self.games = [Game.from_record(record) for record in records]
+        for game in self.games:
+            game.date = date
 
-        if games_json is not None:
-            self.games = [Game(game) for game in games_json]
-        else:
-            self.games = []
+    def prefetch_highlights(self, max_workers=PREFETCH_WORKERS, time_budget=PREFETCH_TIME_BUDGET, cancel=None):
+        """
+        Query the highlights of all games in parallel, see prefetch_highlights().
+        """
+        prefetch_highlights(self.games, max_workers, time_budget, cancel)
 
     def __unicode__(self):
         x = u"--- GameDay: {0}".format(self.date)
@@ -246,19 +1000,233 @@ class GameDay:
         return unicode(self).encode('utf-8')
 
 
+def query_schedule_range(date_start, date_end, retries=resilience.RETRIES):
+    """
+    Query the schedules of a date range in one request and store them in
+    the cache as schedules of the single days (including days without games).
+
+    :param retries: maximum number of retries, see query()
+    :type retries: int
+    :return: game records of the single days
+    :rtype: dict (datetime.date -> list of tuple)
+    """
+    data = query_json(schedule_url(date_start, date_end), SCHEDULE_FIELDS, retries)
+    days = {}
+    for date_json in data.get("dates", []):
+        try:
+            days[parse_date(date_json["date"])] = game_records({"dates": [date_json]})
+        except KeyError:
+            continue
+
+    date = date_start
+    while date <= date_end:
+        days.setdefault(date, [])
+        if _cache is not None:
+            _cache.put(records_key(schedule_url(date, date)), days[date])
+        date += datetime.timedelta(1)
+    return days
+
+
+def date_spans(dates):
+    """
+    Split dates into runs of consecutive days.
+
+    :type dates: list of datetime.date
+    :return: (first date, last date) of each run, in ascending order
+    :rtype: list of tuple
+    """
+    spans = []
+    for date in sorted(set(dates)):
+        if spans and date == spans[-1][1] + datetime.timedelta(1):
+            spans[-1] = (spans[-1][0], date)
+        else:
+            spans.append((date, date))
+    return spans
+
+
+def get_gamedays(dates):
+    """
+    Load the schedules of several dates. Cached schedules are used where
+    available; each run of consecutive dates missing from the cache is
+    queried in one range request. Expired schedules are handled as in
+    get_json(): if they expired less than STALE_WHILE_REVALIDATE ago, they
+    are used right away and queried again in the background, otherwise
+    they are queried without retries and used if the API cannot be reached.
+
+    :param dates: dates to load
+    :type dates: list of datetime.date
+    :return: one GameDay per date, in the same order
+    :rtype: list of GameDay
+    :raises IOError: if the API could not be reached and none of the dates
+        is cached
+    """
+    scope = "endpoint:schedule"
+    records = {}
+    expired = {}
+    stale = []
+    missing = []
+    now = time.time()
+    for date in dates:
+        entry = _cache.get_entry(records_key(schedule_url(date, date))) if _cache is not None else None
+        if entry is not None:
+            age = now - entry.time
+            ttl = date_ttl(date)
+            if age <= ttl + STALE_WHILE_REVALIDATE:
+                records[date] = entry.data
+                if age > ttl:
+                    stale.append(date)
+                continue
+            expired[date] = entry
+        missing.append(date)
+
+    for (date_start, date_end) in date_spans(stale):
+        metrics.count(scope, "cache_stale")
+        run_in_background(records_key(schedule_url(date_start, date_end)),
+                          lambda date_start=date_start, date_end=date_end: query_schedule_range(date_start, date_end))
+
+    error = None
+    for (date_start, date_end) in date_spans(missing):
+        span = [date for date in missing if date_start <= date <= date_end]
+        # with expired schedules to fall back to, do not wait for retries
+        retries = 0 if any(date in expired for date in span) else resilience.RETRIES
+        try:
+            records.update(query_schedule_range(date_start, date_end, retries))
+        except (IOError, ValueError) as e:
+            error = e
+            for date in span:
+                if date in expired:
+                    metrics.count(scope, "cache_fallback")
+                    records[date] = expired[date].data
+    if error is not None and not records:
+        raise error
+    return [GameDay(date, records=records.get(date) or []) for date in dates]
+
+
 def get_season_dates(year):
-    query_url = "https://statsapi.mlb.com/api/v1/seasons?sportId=1&seasonId={0}".format(year)
-    response = urllib.urlopen(query_url)
-    data = json.loads(response.read())
+    query_url = "{0}/seasons?sportId=1&seasonId={1}".format(API_URL, year)
+    data = get_json(query_url, TTL_SEASON)
 
     try:
         season_json = data["seasons"][0]
-        return (dateutil.parser.parse(season_json["regularSeasonStartDate"]).date(),
-                dateutil.parser.parse(season_json["regularSeasonEndDate"]).date())
-    except IndexError:
+        return (parse_date(season_json["regularSeasonStartDate"]),
+                parse_date(season_json["regularSeasonEndDate"]))
+    except (KeyError, IndexError):
         return None
 
 
+class SeasonIndex:
+    """
+    Dates with games and the games of each team for a regular season,
+    built from one schedule query for the whole season and then updated
+    for new dates only. The index is kept in the cache.
+    """
+    # members:
+    # - year
+    # - dates (dict: date "YYYY-MM-DD" -> number of games)
+    # - team_games (dict: team id (str) -> list of [date, gamePk])
+    # - final_until (last date "YYYY-MM-DD" whose games are all finished)
+    # - updated (time of the last update)
+    def __init__(self, year):
+        self.year = year
+        self.dates = {}
+        self.team_games = {}
+        self.final_until = None
+        self.updated = 0
+
+        if _cache is not None:
+            data = _cache.get(self.cache_key(), None)
+            if data is not None:
+                self.dates = data["dates"]
+                self.team_games = data["team_games"]
+                self.final_until = data["final_until"]
+                self.updated = data["updated"]
+
+    def cache_key(self):
+        return "season-index:{0}".format(self.year)
+
+    def save(self):
+        if _cache is not None:
+            _cache.put(self.cache_key(), {"dates": self.dates,
+                                          "team_games": self.team_games,
+                                          "final_until": self.final_until,
+                                          "updated": self.updated})
+
+    def is_fresh(self):
+        return time.time() - self.updated < TTL_LIVE
+
+    def update(self):
+        """
+        Query the schedule for all dates not indexed as finished yet, up to today.
+        """
+        season_dates = get_season_dates(self.year)
+        if season_dates is None:
+            return
+        today = datetime.date.today()
+        date_start = season_dates[0]
+        if self.final_until is not None:
+            date_start = max(date_start, parse_date(self.final_until) + datetime.timedelta(1))
+        date_end = min(today, season_dates[1])
+
+        if date_start <= date_end:
+            query_url = "{0}/schedule?sportId=1&startDate={1}&endDate={2}&gameType=R".format(
+                API_URL, date_start, date_end)
+            data = query_json(query_url, SCHEDULE_INDEX_FIELDS)
+            self.add_dates(data.get("dates", []), date_start)
+
+        final_date = min(today - datetime.timedelta(2), season_dates[1])
+        if final_date >= season_dates[0]:
+            self.final_until = str(final_date)
+        self.updated = time.time()
+        self.save()
+
+    def add_dates(self, dates_json, date_start):
+        # drop previous entries of the re-queried dates
+        date_start = str(date_start)
+        for date in [d for d in self.dates if d >= date_start]:
+            del self.dates[date]
+        for team_id in self.team_games:
+            self.team_games[team_id] = [g for g in self.team_games[team_id] if g[0] < date_start]
+
+        for date_json in dates_json:
+            try:
+                date = date_json["date"]
+                games_json = date_json["games"]
+            except KeyError:
+                continue
+            self.dates[date] = len(games_json)
+            for game_json in games_json:
+                for ha in ("away", "home"):
+                    try:
+                        team_id = str(game_json["teams"][ha]["team"]["id"])
+                    except KeyError:
+                        continue
+                    self.team_games.setdefault(team_id, []).append([date, game_json["gamePk"]])
+
+    def gamedays(self):
+        """
+        :return: dates with games, latest first
+        :rtype: list of datetime.date
+        """
+        return [parse_date(d) for d in sorted(self.dates, reverse=True) if self.dates[d] > 0]
+
+
+def get_season_index(year):
+    """
+    Load the season index, updating it if it is older than TTL_LIVE. A
+    stored index is returned right away and updated in the background;
+    without one, the index is updated first.
+
+    :raises IOError: if there is no stored index and the API could not be reached
+    """
+    index = SeasonIndex(year)
+    if not index.is_fresh():
+        if index.updated:
+            run_in_background(index.cache_key(), lambda: SeasonIndex(year).update())
+        else:
+            index.update()
+    return index
+
+
 class Team:
     def __init__(self, name, abbreviation, team_id):
         self.name = name
@@ -267,40 +1235,38 @@ class Team:
 
 
 def get_teams():
-    query_url = "https://statsapi.mlb.com/api/v1/teams?sportId=1"
-    response = urllib.urlopen(query_url)
-    data = json.loads(response.read())
+    query_url = "{0}/teams?sportId=1".format(API_URL)
+    data = get_json(query_url, TTL_SEASON)
 
     try:
         teams_json = data["teams"]
-    except IndexError:
+    except KeyError:
         return []
 
     teams = []
     for team_json in teams_json:
-        teams.append(Team(team_json["name"], team_json["abbreviation"], team_json["id"]))
+        try:
+            teams.append(Team(team_json["name"], team_json["abbreviation"], team_json["id"]))
+        except KeyError:
+            pass
     return sorted(teams, key=lambda x: x.abbreviation)
 
 
 class GamesByTeam:
     def __init__(self, date_start, date_end, team_id):
-        query_url = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&startDate={0}&endDate={1}&teamId={2}&gameType=R&hydrate=game(content(all)),linescore,team".format(
-            date_start, date_end, team_id)
-        response = urllib.urlopen(query_url)
-        data = json.loads(response.read())
+        # look up the dates and games of the team in the season index, the
+        # games themselves come from the (mostly cached) schedules of these dates
+        team_games = []
+        for year in range(date_start.year, date_end.year + 1):
+            index = get_season_index(year)
+            team_games += index.team_games.get(str(team_id), [])
+        team_games = [g for g in team_games if str(date_start) <= g[0] <= str(date_end)]
 
-        try:
-            dates_json = data["dates"]
-        except KeyError:
-            dates_json = []
+        dates = sorted(set(parse_date(g[0]) for g in team_games))
+        game_ids = set(g[1] for g in team_games)
 
         self.games = []
-        for date_json in dates_json:
-            try:
-                games_json = date_json["games"]
-            except KeyError:
-                games_json = None
-
-            if games_json is not None:
-                for game_json in games_json:
-                    self.games.append(Game(game_json))
+        for gameday in get_gamedays(dates):
+            for game in gameday.games:
+                if game.gameId in game_ids:
+                    self.games.append(game)
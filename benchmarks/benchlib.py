@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Module: benchlib
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Shared parts of the benchmarks: paths, the fixture manifest, recorded
+responses and timing.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+STUBS_DIR = os.path.join(BENCH_DIR, "stubs")
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+MANIFEST = os.path.join(FIXTURES_DIR, "manifest.json")
+
+# API URL for building queries whose URL is the request path of their fixture
+FIXTURE_API_URL = "/api/v1"
+
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+import replay
+
+
+def load_manifest():
+    with open(MANIFEST, "rb") as f:
+        return json.load(f)
+
+
+def argument_parser(description):
+    """
+    Command line options shared by the benchmarks working on single
+    recorded responses.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--record", action="store_true", help="record missing fixtures from the real API")
+    parser.add_argument("--upstream", default=replay.UPSTREAM_URL, metavar="URL",
+                        help="API to record from (default: {0})".format(replay.UPSTREAM_URL))
+    parser.add_argument("--repeat", type=int, default=20, help="repetitions of each measurement")
+    return parser
+
+
+class Fixtures:
+    """
+    Recorded responses of the queries of a benchmark, for the day the
+    fixtures of run.py were recorded.
+    """
+    # members:
+    # - manifest (see run.py)
+    # - today (day of recording)
+    # - record (URL of the API to record missing fixtures from, None to fail)
+    def __init__(self, args):
+        if not os.path.exists(MANIFEST):
+            sys.exit("no fixtures recorded, run benchmarks/run.py --record first")
+        self.manifest = load_manifest()
+        self.today = datetime.datetime.strptime(self.manifest["today"], "%Y-%m-%d").date()
+        self.record = args.upstream if args.record else None
+
+    def body(self, url, fields=None):
+        """
+        Response body of a query.
+
+        :param url: query URL, built with FIXTURE_API_URL
+        :param fields: field filter the query is sent with
+        :rtype: str
+        """
+        if fields is not None:
+            url = "{0}{1}fields={2}".format(url, "&" if "?" in url else "?", fields)
+        fixture = replay.load_fixture(FIXTURES_DIR, url, self.record)
+        if fixture is None:
+            sys.exit("no fixture for {0}, run with --record".format(url))
+        if fixture.status != 200:
+            sys.exit("recorded HTTP {0} for {1}".format(fixture.status, url))
+        return fixture.body
+
+
+def measure(func, repeat):
+    """
+    :return: median and minimum duration of func (seconds)
+    :rtype: tuple
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        durations.append(time.time() - start)
+    durations.sort()
+    return (durations[len(durations) // 2], durations[0])
+
+
+def print_table(header, rows):
+    """
+    :param header: column titles, the first column is left-aligned
+    :param rows: rows of the same length, str or numbers (formatted with 1 decimal)
+    """
+    def cell(value):
+        return "{0:.1f}".format(value) if isinstance(value, float) else str(value)
+
+    rows = [[cell(v) for v in row] for row in rows]
+    widths = [max(len(r[i]) for r in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join([row[0].ljust(widths[0])] + [v.rjust(w) for (v, w) in zip(row[1:], widths[1:])]))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Module: cacheload
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Compare loading a cached schedule / game content as stored by the cache:
+Game / Highlight records in a compressed pickle, with loading the API
+response from a JSON file (the cache format before the records) and
+building the models from it. Size on disk and load time, on the recorded
+projected responses of payloads.py.
+
+    python benchmarks/cacheload.py --record      # record the missing responses
+    python benchmarks/cacheload.py
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import shutil
+import tempfile
+
+import benchlib
+import payloads
+import baseballhighlights
+import cache
+
+
+def load_json_entry(filename, build):
+    with open(filename, "rb") as f:
+        return build(json.load(f)["data"])
+
+
+def build_games(schedule_json):
+    return [baseballhighlights.Game(game_json) for date_json in schedule_json.get("dates", [])
+            for game_json in date_json.get("games", [])]
+
+
+def build_highlights(content_json):
+    highlights_json = content_json["highlights"]["highlights"]["items"]
+    return [baseballhighlights.Highlight(highlights_json[i])
+            for i in baseballhighlights.highlight_order(highlights_json)]
+
+
+def main():
+    parser = benchlib.argument_parser("Compare loading cached records with loading cached API responses.")
+    args = parser.parse_args()
+    fixtures = benchlib.Fixtures(args)
+
+    models = {
+        "schedule, 1 day": (build_games, baseballhighlights.game_records,
+                            lambda records: [baseballhighlights.Game.from_record(r) for r in records]),
+        "game content": (build_highlights, baseballhighlights.content_records,
+                         lambda records: [baseballhighlights.Highlight.from_record(r) for r in records]),
+    }
+    tmp_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    try:
+        store = cache.Cache(os.path.join(tmp_dir, "cache"))
+        rows = []
+        for (name, _, projected_url, fields) in payloads.queries(fixtures):
+            if name not in models:
+                continue
+            (build, to_records, from_records) = models[name]
+            data = baseballhighlights.decode_json(fixtures.body(projected_url, fields), fields)
+
+            json_filename = os.path.join(tmp_dir, "response.json")
+            with open(json_filename, "wb") as f:
+                json.dump({"data": data, "validators": None}, f)
+            key = baseballhighlights.records_key(projected_url)
+            store.put(key, to_records(data, None))
+
+            for (variant, filename, load) in (
+                    ("API JSON", json_filename, lambda: load_json_entry(json_filename, build)),
+                    ("records", store._filename(key), lambda: from_records(store.get_entry(key).data))):
+                (median, best) = benchlib.measure(load, args.repeat)
+                rows.append([name, variant, str(len(load())), os.path.getsize(filename) / 1024.0,
+                             median * 1e6, best * 1e6])
+        benchlib.print_table(["cached", "format", "items", "KB", "load us", "min us"], rows)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
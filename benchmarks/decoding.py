@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Module: decoding
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Compare pruning a response the API did not filter after decoding it (a
+complete decoded copy, then a pruned one) with dropping the unused members
+while decoding: peak memory and time to the first item, on the recorded
+full responses of payloads.py.
+
+    python benchmarks/decoding.py --record      # record the missing responses
+    python benchmarks/decoding.py
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import subprocess
+import sys
+
+import benchlib
+import payloads
+import baseballhighlights
+from run import peak_rss
+
+
+def prune_after_parse(body, fields):
+    """
+    Decoding of baseballhighlights._query() before the members were dropped
+    while decoding.
+    """
+    def prune(data):
+        if isinstance(data, dict):
+            return dict((k, prune(v)) for (k, v) in data.iteritems() if k in fields)
+        elif isinstance(data, list):
+            return [prune(v) for v in data]
+        else:
+            return data
+
+    fields = frozenset(fields.split(","))
+    return prune(json.loads(body))
+
+
+VARIANTS = [
+    ("after parse", prune_after_parse),
+    ("while decoding", baseballhighlights.decode_json),
+]
+
+
+def first_item(data):
+    """
+    Build the first model object of a decoded response, as the listings do.
+    """
+    if "dates" in data:
+        return baseballhighlights.Game(data["dates"][0]["games"][0])
+    for highlight_json in data["highlights"]["highlights"]["items"]:
+        if baseballhighlights.get_playback_url(highlight_json) is not None:
+            return baseballhighlights.Highlight(highlight_json)
+
+
+def replay_body(url):
+    return benchlib.replay.load_fixture(benchlib.FIXTURES_DIR, url).body
+
+
+def run_child(variant, url, fields):
+    """
+    Decode a response once in this interpreter and print the increase of
+    the peak memory (KB) as JSON.
+    """
+    body = replay_body(url)
+    try:
+        # reset the high water mark to the current memory (Linux)
+        with open("/proc/self/clear_refs", "wb") as f:
+            f.write("5")
+    except IOError:
+        pass
+    before = peak_rss()
+    dict(VARIANTS)[variant](body, fields)
+    print(json.dumps({"peak_kb": peak_rss() - before}))
+
+
+def measure_peak(variant, url, fields):
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--child", variant, url, fields])
+    return json.loads(output.strip().splitlines()[-1])["peak_kb"]
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        baseballhighlights.API_URL = benchlib.FIXTURE_API_URL
+        run_child(*sys.argv[2:5])
+        return
+
+    parser = benchlib.argument_parser("Compare pruning unfiltered API responses after and while decoding.")
+    args = parser.parse_args()
+    fixtures = benchlib.Fixtures(args)
+
+    rows = []
+    for (name, full_url, _, fields) in payloads.queries(fixtures):
+        body = fixtures.body(full_url)
+        for (variant, decode) in VARIANTS:
+            (median, best) = benchlib.measure(lambda: first_item(decode(body, fields)), args.repeat)
+            rows.append([name, variant, len(body) / 1024.0, median * 1000, best * 1000,
+                         measure_peak(variant, full_url, fields)])
+    benchlib.print_table(["response", "pruned", "KB", "first item ms", "min ms", "peak +KB"], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Module: models
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Compare the slotted Highlight and Game models, which resolve artwork and
+derived fields when accessed, with models built as before (attributes in a
+dict, everything resolved when built, one scan of the image cuts per
+size): construction time, time including all fields a listing displays,
+and size of an object, on the recorded responses of payloads.py.
+
+    python benchmarks/models.py --record      # record the missing responses
+    python benchmarks/models.py
+"""
+
+from __future__ import print_function
+
+import sys
+
+import benchlib
+import payloads
+import baseballhighlights
+from baseballhighlights import Highlight, Game, ART_SIZES
+
+
+def image_url(image_json, max_size):
+    """
+    Image lookup before get_image_urls(), one scan of the cuts per size.
+    """
+    try:
+        return next(c["src"] for c in image_json["cuts"] if c["width"] <= max_size)
+    except (KeyError, TypeError, StopIteration):
+        return None
+
+
+class EagerHighlight(Highlight):
+    def __init__(self, highlight_json):
+        Highlight.__init__(self, highlight_json)
+        self._art = tuple(image_url(self._image_json, size) for size in ART_SIZES)
+        self._duration = baseballhighlights.convert_duration(self._duration_str) if self._duration_str else 0
+
+
+class EagerGame(Game):
+    def __init__(self, game_json):
+        Game.__init__(self, game_json)
+        self._art = tuple(image_url(self._image_json, size) for size in ART_SIZES)
+        self.eager_title_time = self.title_time
+
+
+def display(item):
+    """
+    Access the fields a listing displays.
+    """
+    (item.fanart, item.thumb, item.icon)
+    if isinstance(item, Highlight):
+        item.duration
+    else:
+        item.title_time
+
+
+def object_size(item):
+    size = sys.getsizeof(item)
+    if hasattr(item, "__dict__"):
+        size += sys.getsizeof(item.__dict__)
+    return size
+
+
+def items_json(fixtures):
+    """
+    :return: (name, JSON items, classes) of the compared models
+    """
+    by_name = dict((name, (full_url, fields)) for (name, full_url, _, fields) in payloads.queries(fixtures))
+    (url, fields) = by_name["schedule, 8 days"]
+    schedule_json = baseballhighlights.decode_json(fixtures.body(url), fields)
+    games_json = [g for d in schedule_json["dates"] for g in d["games"]]
+    (url, fields) = by_name["game content"]
+    content_json = baseballhighlights.decode_json(fixtures.body(url), fields)
+    highlights_json = [h for h in content_json["highlights"]["highlights"]["items"]
+                       if baseballhighlights.get_playback_url(h) is not None]
+    return [("Highlight", highlights_json, (EagerHighlight, Highlight)),
+            ("Game", games_json, (EagerGame, Game))]
+
+
+def main():
+    parser = benchlib.argument_parser("Compare construction cost and size of the Highlight and Game models.")
+    args = parser.parse_args()
+    fixtures = benchlib.Fixtures(args)
+
+    rows = []
+    for (name, json_items, classes) in items_json(fixtures):
+        for (variant, cls) in zip(("eager", "lazy"), classes):
+            def build():
+                return [cls(j) for j in json_items]
+
+            def build_displayed():
+                for item in build():
+                    display(item)
+
+            per_item = 1e6 / max(len(json_items), 1)
+            built = benchlib.measure(build, args.repeat)[0] * per_item
+            displayed = benchlib.measure(build_displayed, args.repeat)[0] * per_item
+            rows.append([name, variant, str(len(json_items)), built, displayed, str(object_size(build()[0]))])
+    benchlib.print_table(["model", "variant", "items", "build us", "displayed us", "bytes"], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Module: parsing
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Compare the date, time stamp and duration parsers of the plugin with
+dateutil: cost per call for the values of the recorded responses of
+payloads.py (first call and repeated, memoized call), and the import time
+of dateutil and of the plugin module.
+
+    python benchmarks/parsing.py --record      # record the missing responses
+    python benchmarks/parsing.py
+"""
+
+from __future__ import print_function
+
+import subprocess
+import sys
+
+import benchlib
+import payloads
+import baseballhighlights
+
+import dateutil.parser
+
+
+def dateutil_duration(duration_string):
+    time = dateutil.parser.parse(duration_string).time()
+    return time.hour * 3600 + time.minute * 60 + time.second
+
+
+PARSERS = [
+    ("date", baseballhighlights.parse_date, lambda s: dateutil.parser.parse(s).date(), None),
+    ("time stamp", baseballhighlights.parse_datetime, dateutil.parser.parse, baseballhighlights._datetime_cache),
+    ("duration", baseballhighlights.convert_duration, dateutil_duration, baseballhighlights._duration_cache),
+]
+
+
+def parsed_values(fixtures):
+    """
+    :return: the dates, time stamps and durations of the recorded responses
+    :rtype: tuple of lists
+    """
+    by_name = dict((name, (full_url, fields)) for (name, full_url, _, fields) in payloads.queries(fixtures))
+    (url, fields) = by_name["schedule, 8 days"]
+    schedule_json = baseballhighlights.decode_json(fixtures.body(url), fields)
+    dates = [d["date"] for d in schedule_json["dates"]]
+    timestamps = [g["gameDate"] for d in schedule_json["dates"] for g in d["games"]]
+    (url, fields) = by_name["game content"]
+    content_json = baseballhighlights.decode_json(fixtures.body(url), fields)
+    durations = [h["duration"] for h in content_json["highlights"]["highlights"]["items"] if "duration" in h]
+    return (dates, timestamps, durations)
+
+
+def import_time(module, repeat):
+    """
+    Median time (seconds) to import a module in a new interpreter.
+    """
+    code = "import sys, time; sys.path.insert(0, {0!r}); t = time.time(); import {1}; print(time.time() - t)".format(
+        benchlib.REPO_DIR, module)
+    durations = sorted(float(subprocess.check_output([sys.executable, "-c", code]).strip()) for _ in range(repeat))
+    return durations[len(durations) // 2]
+
+
+def main():
+    parser = benchlib.argument_parser("Compare the date and duration parsers of the plugin with dateutil.")
+    args = parser.parse_args()
+    fixtures = benchlib.Fixtures(args)
+
+    rows = []
+    for ((name, parse, reference, parse_cache), values) in zip(PARSERS, parsed_values(fixtures)):
+        per_call = 1e6 / max(len(values), 1)
+
+        def parse_all(func, clear_cache):
+            if clear_cache and parse_cache is not None:
+                parse_cache.clear()
+            for value in values:
+                func(value)
+
+        parse_all(parse, False)
+        rows.append([name, str(len(values)),
+                     benchlib.measure(lambda: parse_all(reference, False), args.repeat)[0] * per_call,
+                     benchlib.measure(lambda: parse_all(parse, True), args.repeat)[0] * per_call,
+                     benchlib.measure(lambda: parse_all(parse, False), args.repeat)[0] * per_call])
+    benchlib.print_table(["value", "calls", "dateutil us", "plugin us", "repeated us"], rows)
+
+    print()
+    repeat = max(args.repeat // 4, 3)
+    benchlib.print_table(["import", "ms"], [[module, import_time(module, repeat) * 1000]
+                                            for module in ("dateutil.parser", "baseballhighlights")])
+
+
+if __name__ == '__main__':
+    main()
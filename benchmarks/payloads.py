@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Module: payloads
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Compare the responses of the fully hydrated queries (as sent before the
+field filters) with the projected queries of the plugin: payload size and
+parse time, on recorded responses.
+
+    python benchmarks/payloads.py --record      # record the missing responses
+    python benchmarks/payloads.py
+"""
+
+from __future__ import print_function
+
+import datetime
+import zlib
+
+import benchlib
+import baseballhighlights
+
+# hydration of the schedule queries before the field filters
+FULL_HYDRATE = "game(content(all)),linescore,team"
+
+
+def queries(fixtures):
+    """
+    :return: (name, full URL, projected URL, field filter) of the compared queries
+    :rtype: list of tuple
+    """
+    api_url = baseballhighlights.API_URL = benchlib.FIXTURE_API_URL
+    today = fixtures.today
+    yesterday = today - datetime.timedelta(1)
+    week_start = today - datetime.timedelta(7)
+    game_id = str(fixtures.manifest["game_id"])
+
+    def full_schedule(date_start, date_end):
+        return "{0}/schedule?sportId=1&startDate={1}&endDate={2}&gameType=R&hydrate={3}".format(
+            api_url, date_start, date_end, FULL_HYDRATE)
+
+    content_url = baseballhighlights.Game(game_id, "").content_url()
+    return [
+        ("schedule, 1 day", full_schedule(yesterday, yesterday),
+         baseballhighlights.schedule_url(yesterday, yesterday), baseballhighlights.SCHEDULE_FIELDS),
+        ("schedule, 8 days", full_schedule(week_start, today),
+         baseballhighlights.schedule_url(week_start, today), baseballhighlights.SCHEDULE_FIELDS),
+        ("game schedule", "{0}/schedule?sportId=1&gamePk={1}&hydrate={2}".format(api_url, game_id, FULL_HYDRATE),
+         baseballhighlights.game_url(game_id),
+         baseballhighlights.SCHEDULE_FIELDS + "," + baseballhighlights.HIGHLIGHT_FIELDS),
+        ("game content", content_url, content_url, baseballhighlights.HIGHLIGHT_FIELDS),
+    ]
+
+
+def decode(body, fields):
+    """
+    Decode a response as the plugin does, see baseballhighlights._query().
+    """
+    return baseballhighlights.decode_json(body, fields)
+
+
+def main():
+    parser = benchlib.argument_parser("Compare payload sizes and parse times of full and projected API queries.")
+    args = parser.parse_args()
+    fixtures = benchlib.Fixtures(args)
+
+    rows = []
+    for (name, full_url, projected_url, fields) in queries(fixtures):
+        for (variant, body, decode_fields) in (("full", fixtures.body(full_url), None),
+                                               ("projected", fixtures.body(projected_url, fields), fields)):
+            (median, best) = benchlib.measure(lambda: decode(body, decode_fields), args.repeat)
+            rows.append([name, variant, len(body) / 1024.0, len(zlib.compress(body, 6)) / 1024.0,
+                         median * 1000, best * 1000])
+    benchlib.print_table(["query", "variant", "KB", "KB gzip", "parse ms", "min ms"], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# Module: replay
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import BaseHTTPServer
+import SocketServer
+import gzip
+import hashlib
+import json
+import os
+import StringIO
+import threading
+import time
+import urllib2
+
+UPSTREAM_URL = "https://statsapi.mlb.com"
+# headers of recorded responses which are replayed
+REPLAYED_HEADERS = ("etag", "last-modified", "content-type")
+
+
+def fixture_filename(fixtures_dir, path):
+    return os.path.join(fixtures_dir, hashlib.sha1(path).hexdigest() + ".json")
+
+
+class Fixture:
+    # members:
+    # - path (request path including the query)
+    # - status
+    # - headers (dict, lower-case names)
+    # - body (decoded)
+    def __init__(self, path, status, headers, body):
+        self.path = path
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @staticmethod
+    def load(filename):
+        with open(filename, "rb") as f:
+            data = json.load(f)
+        return Fixture(data["path"].encode("utf-8"), data["status"], data["headers"], data["body"].encode("utf-8"))
+
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            json.dump({"path": self.path, "status": self.status, "headers": self.headers,
+                       "body": self.body.decode("utf-8")}, f, indent=1, sort_keys=True)
+
+
+def fetch_upstream(upstream_url, path):
+    """
+    Query the real API for a fixture.
+
+    :rtype: Fixture
+    """
+    request = urllib2.Request(upstream_url + path, headers={"Accept-Encoding": "identity"})
+    try:
+        response = urllib2.urlopen(request, timeout=30)
+        (status, headers, body) = (response.getcode(), response.info(), response.read())
+    except urllib2.HTTPError as e:
+        (status, headers, body) = (e.code, e.info(), e.read())
+    return Fixture(path, status, dict((k, headers[k]) for k in REPLAYED_HEADERS if k in headers), body)
+
+
+def load_fixture(fixtures_dir, path, record=None):
+    """
+    Fixture of a request path, recorded from the real API if it is missing
+    and record is given.
+
+    :param record: URL of the API to record from, None to only load
+    :return: the fixture, None if it is missing
+    :rtype: Fixture
+    """
+    filename = fixture_filename(fixtures_dir, path)
+    if os.path.exists(filename):
+        return Fixture.load(filename)
+    if record is None:
+        return None
+    fixture = fetch_upstream(record, path)
+    fixture.save(filename)
+    return fixture
+
+
+class ReplayHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        fixture = server.get_fixture(self.path)
+        if fixture is None:
+            server.count(self.path, 0, missing=True)
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(server.latency)
+        etag = fixture.headers.get("etag")
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            server.count(self.path, 0)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = fixture.body
+        encoding = None
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            buf = StringIO.StringIO()
+            with gzip.GzipFile(fileobj=buf, mode="wb") as f:
+                f.write(body)
+            body = buf.getvalue()
+            encoding = "gzip"
+
+        server.count(self.path, len(body))
+        self.send_response(fixture.status)
+        for (name, value) in fixture.headers.iteritems():
+            self.send_header(name, value)
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.send_body(body)
+
+    def send_body(self, body):
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        # send in slices of 1/10 s at the configured rate
+        chunk_size = max(1, bandwidth // 10)
+        for i in range(0, len(body), chunk_size):
+            self.wfile.write(body[i:i + chunk_size])
+            self.wfile.flush()
+            time.sleep(0.1)
+
+
+class ReplayServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Local HTTP server answering API queries from recorded fixtures, with
+    a simulated latency (seconds per request) and bandwidth (bytes per
+    second, 0 for unlimited). In record mode, queries without a fixture are
+    forwarded to the real API and their responses are recorded.
+    """
+    # members:
+    # - fixtures_dir
+    # - latency
+    # - bandwidth
+    # - record (None, or the URL of the API to record from)
+    # - requests (number of requests answered)
+    # - bytes_sent (response body bytes sent)
+    # - missing (paths of requests without a fixture)
+    daemon_threads = True
+
+    def __init__(self, fixtures_dir, latency=0.0, bandwidth=0, record=None):
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", 0), ReplayHandler)
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.record = record
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def api_url(self):
+        return "http://127.0.0.1:{0}/api/v1".format(self.server_port)
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.missing = []
+
+    def count(self, path, bytes_sent, missing=False):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += bytes_sent
+            if missing:
+                self.missing.append(path)
+
+    def get_fixture(self, path):
+        return load_fixture(self.fixtures_dir, path, self.record)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+# Module: run
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Benchmark the plugin modes against recorded API responses.
+
+    python benchmarks/run.py --record           # record fixtures from the real API
+    python benchmarks/run.py                    # cold cache, no network delay
+    python benchmarks/run.py --latency 100 --bandwidth 1000 --warm
+
+Every mode runs in a new interpreter (as in Kodi) with the stub xbmc
+modules from benchmarks/stubs. The results are appended to
+benchmarks/results.jsonl and compared to the previous run with the same
+options.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from urlparse import parse_qsl
+
+from benchlib import BENCH_DIR, REPO_DIR, STUBS_DIR, FIXTURES_DIR, MANIFEST, load_manifest
+
+RESULTS = os.path.join(BENCH_DIR, "results.jsonl")
+# bytes "received" by each video request of a playlist and the seconds it takes, see _ApiUrlPatcher
+VIDEO_WARM_UP = (1024 * 1024, 0.5)
+
+# (name, paramstring), placeholders are filled from the fixture manifest
+MODES = [
+    ("top", ""),
+    ("recent", "mode=recent"),
+    ("bydate", "mode=bydate"),
+    ("bydate-month", "mode=bydate&month={month}"),
+    ("byteam", "mode=byteam"),
+    ("gameday", "mode=gameday&date={yesterday}"),
+    ("gamesbyteam", "mode=gamesbyteam&teamId={team_id}"),
+    ("game", "mode=game&gameId={game_id}&title={game_title}"),
+    ("game-notitle", "mode=game&gameId={game_id}"),
+    ("search", "mode=search&query=home+run"),
+    ("highlight", "mode=highlight&video=http%3A%2F%2Fexample.com%2Fvideo.mp4"),
+    ("playall", "mode=playall&gameId={game_id}&title={game_title}"),
+    ("diagnostics", "mode=diagnostics"),
+    ("diag-export", "mode=diagnostics&export=1"),
+]
+
+
+class _ApiUrlPatcher(object):
+    """
+    Import hook pointing baseballhighlights to the replay server as soon
+    as main.py imports it, so the lazy import stays part of the measurement.
+    The video requests of a playlist (httpclient.warm_up()) go to the CDN,
+    not the API, and are answered without network instead.
+    """
+    def __init__(self, api_url):
+        self.api_url = api_url
+        self.names = set(["baseballhighlights", "httpclient"])
+
+    def find_module(self, name, path=None):
+        if name in self.names:
+            return self
+        return None
+
+    def load_module(self, name):
+        self.names.remove(name)
+        if not self.names:
+            sys.meta_path.remove(self)
+        module = importlib.import_module(name)
+        if name == "baseballhighlights":
+            module.API_URL = self.api_url
+        else:
+            module.warm_up = _warm_up
+        return module
+
+
+def _warm_up(url, num_bytes=None, timeout=None):
+    return VIDEO_WARM_UP
+
+
+def _freeze_today(today):
+    class FrozenDate(datetime.date):
+        @classmethod
+        def today(cls):
+            return today
+    datetime.date = FrozenDate
+
+
+def peak_rss():
+    """
+    Peak resident memory of this process in KB, None if unknown.
+    """
+    # on Linux, getrusage() reports the peak of the parent process if it
+    # was larger, use the high water mark of this process instead
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_child(paramstring):
+    """
+    Run main.py for one mode in this interpreter and print the measurements
+    as JSON.
+    """
+    sys.path[0:0] = [STUBS_DIR, REPO_DIR]
+    _freeze_today(datetime.datetime.strptime(os.environ["BENCH_TODAY"], "%Y-%m-%d").date())
+    sys.meta_path.insert(0, _ApiUrlPatcher(os.environ["BENCH_API_URL"]))
+    import xbmc
+    import xbmcplugin
+
+    sys.argv = ["plugin://plugin.video.baseballhighlights/", "1", "?" + paramstring]
+    start = time.time()
+    runpy.run_path(os.path.join(REPO_DIR, "main.py"), run_name="__main__")
+    wall = time.time() - start
+
+    print(json.dumps({"wall": wall, "peak_rss_kb": peak_rss(), "succeeded": xbmcplugin.succeeded,
+                      "items": [url for (url, _, _) in xbmcplugin.items] + xbmc.played}))
+
+
+def run_mode(server, paramstring, profile, today, settings):
+    env = dict(os.environ)
+    env.update({"BENCH_PROFILE": profile,
+                "BENCH_API_URL": server.api_url,
+                "BENCH_TODAY": today.isoformat(),
+                "BENCH_SETTINGS": json.dumps(settings)})
+    server.reset_stats()
+    start = time.time()
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), "--child", paramstring], env=env)
+    process = time.time() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    result.update({"process": process,
+                   "requests": server.requests,
+                   "bytes": server.bytes_sent,
+                   "missing": server.missing})
+    return result
+
+
+def placeholders(manifest):
+    today = datetime.datetime.strptime(manifest["today"], "%Y-%m-%d").date()
+    values = dict(manifest)
+    values["yesterday"] = (today - datetime.timedelta(1)).isoformat()
+    values["month"] = today.strftime("%Y-%m")
+    return values
+
+
+def update_manifest(manifest, name, items):
+    # the game and team of the later modes are taken from the recorded listings
+    if not items:
+        return
+    params = dict(parse_qsl(items[0].split("?", 1)[-1]))
+    if name == "byteam":
+        manifest["team_id"] = params.get("teamId")
+    elif name == "gameday":
+        manifest["game_id"] = params.get("gameId")
+        manifest["game_title"] = params.get("title", "").replace(" ", "+")
+
+
+def previous_results(options):
+    if not os.path.exists(RESULTS):
+        return None
+    previous = None
+    with open(RESULTS, "rb") as f:
+        for line in f:
+            run = json.loads(line)
+            if run["options"] == options:
+                previous = run
+    return previous
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous):
+    print("{0:<14} {1:>9} {2:>9} {3:>5} {4:>9} {5:>8} {6:>5} {7:>8}".format(
+        "mode", "wall ms", "proc ms", "reqs", "KB", "peak MB", "items", "vs prev"))
+    for (name, r) in results:
+        delta = ""
+        if previous is not None and name in previous["modes"] and previous["modes"][name]["wall"] > 0:
+            delta = "{0:+.0f}%".format((r["wall"] / previous["modes"][name]["wall"] - 1) * 100)
+        peak = "{0:.1f}".format(r["peak_rss_kb"] / 1024.0) if r["peak_rss_kb"] is not None else "-"
+        print("{0:<14} {1:>9.1f} {2:>9.1f} {3:>5} {4:>9.1f} {5:>8} {6:>5} {7:>8}".format(
+            name, r["wall"] * 1000, r["process"] * 1000, r["requests"], r["bytes"] / 1024.0, peak,
+            r["items"], delta))
+        if r["missing"]:
+            print("  missing fixtures: {0}".format(", ".join(r["missing"])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the plugin modes against recorded API responses.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--record", action="store_true", help="record missing fixtures from the real API")
+    parser.add_argument("--upstream", default=None, metavar="URL",
+                        help="API to record from (default: https://statsapi.mlb.com)")
+    parser.add_argument("--latency", type=float, default=0, help="simulated latency per request (ms)")
+    parser.add_argument("--bandwidth", type=int, default=0, help="simulated bandwidth (KB/s, 0: unlimited)")
+    parser.add_argument("--warm", action="store_true", help="measure each mode a second time with a warm cache")
+    parser.add_argument("--modes", help="comma-separated names of the modes to run (default: all)")
+    parser.add_argument("--setting", action="append", default=[], metavar="ID=VALUE",
+                        help="override an addon setting")
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args.child)
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    import replay
+
+    if args.record:
+        if not os.path.isdir(FIXTURES_DIR):
+            os.makedirs(FIXTURES_DIR)
+        manifest = {"today": datetime.date.today().isoformat()}
+    elif not os.path.exists(MANIFEST):
+        parser.error("no fixtures recorded, run with --record first")
+    else:
+        manifest = load_manifest()
+
+    record = (args.upstream or replay.UPSTREAM_URL) if args.record else None
+    server = replay.ReplayServer(FIXTURES_DIR, args.latency / 1000.0, args.bandwidth * 1024, record)
+    server.start()
+    settings = dict(s.split("=", 1) for s in args.setting)
+    today = datetime.datetime.strptime(manifest["today"], "%Y-%m-%d").date()
+    selected = args.modes.split(",") if args.modes else None
+
+    results = []
+    for (name, template) in MODES:
+        if selected is not None and name not in selected:
+            continue
+        paramstring = template.format(**placeholders(manifest))
+        profile = tempfile.mkdtemp(prefix="bench-")
+        try:
+            result = run_mode(server, paramstring, profile, today, settings)
+            if args.warm:
+                result = run_mode(server, paramstring, profile, today, settings)
+        finally:
+            shutil.rmtree(profile, ignore_errors=True)
+        if args.record:
+            update_manifest(manifest, name, result["items"])
+        result["items"] = len(result["items"])
+        results.append((name, result))
+    server.shutdown()
+
+    if args.record:
+        with open(MANIFEST, "wb") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    options = {"latency": args.latency, "bandwidth": args.bandwidth, "warm": args.warm,
+               "settings": settings}
+    print_results(results, previous_results(options))
+    with open(RESULTS, "ab") as f:
+        f.write(json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "revision": git_revision(),
+                            "options": options, "modes": dict(results)}) + "\n")
+
+
+if __name__ == '__main__':
+    main()
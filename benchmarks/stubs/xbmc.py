@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Module: xbmc (benchmark stub)
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import os
+import sys
+
+LOGDEBUG = 0
+LOGINFO = 1
+LOGNOTICE = 2
+LOGWARNING = 3
+LOGERROR = 4
+
+
+def log(msg, level=LOGDEBUG):
+    if level >= LOGWARNING or os.environ.get("BENCH_VERBOSE"):
+        sys.stderr.write("{0}\n".format(msg))
+
+
+def translatePath(path):
+    return path
+
+
+PLAYLIST_MUSIC = 0
+PLAYLIST_VIDEO = 1
+
+# URLs of the clips in the order they were played
+played = []
+# playlist started by Player.play(), advanced by Monitor.waitForAbort()
+_playing = None
+
+
+class PlayList(object):
+    def __init__(self, playList):
+        self.urls = []
+        self.position = -1
+
+    def add(self, url, listitem=None, index=-1):
+        self.urls.append(url)
+
+    def clear(self):
+        del self.urls[:]
+        self.position = -1
+
+    def size(self):
+        return len(self.urls)
+
+    def getposition(self):
+        return self.position
+
+
+class Player(object):
+    def play(self, item=None, listitem=None, windowed=False, startpos=-1):
+        global _playing
+        if isinstance(item, PlayList):
+            _playing = item
+            _advance()
+        else:
+            played.append(item)
+
+    def isPlaying(self):
+        return _playing is not None
+
+    def stop(self):
+        global _playing
+        _playing = None
+
+
+def _advance():
+    global _playing
+    _playing.position += 1
+    if _playing.position < _playing.size():
+        played.append(_playing.urls[_playing.position])
+    else:
+        _playing = None
+
+
+class Monitor(object):
+    def abortRequested(self):
+        return True
+
+    def waitForAbort(self, timeout=None):
+        # Without a playback, Kodi is shutting down at once. During a
+        # playlist, every wait plays the next clip instead of waiting.
+        if _playing is None:
+            return True
+        _advance()
+        return False
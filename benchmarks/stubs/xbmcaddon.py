@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Module: xbmcaddon (benchmark stub)
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import os
+
+import xbmcplugin
+
+
+class Addon(object):
+    def __init__(self, id=None):
+        pass
+
+    def getAddonInfo(self, key):
+        if key == 'profile':
+            return os.environ["BENCH_PROFILE"]
+        return ""
+
+    def getSetting(self, key):
+        return xbmcplugin.getSetting(0, key)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Module: xbmcgui (benchmark stub)
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import os
+
+NOTIFICATION_INFO = "info"
+NOTIFICATION_WARNING = "warning"
+NOTIFICATION_ERROR = "error"
+
+
+class ListItem(object):
+    def __init__(self, label="", label2="", path=""):
+        self.label = label
+        self.path = path
+        self.info = {}
+        self.art = {}
+        self.properties = {}
+
+    def setInfo(self, type, infoLabels):
+        self.info.update(infoLabels)
+
+    def setArt(self, art):
+        self.art.update(art)
+
+    def setProperty(self, key, value):
+        self.properties[key] = value
+
+
+class Dialog(object):
+    def input(self, heading, defaultt="", type=0):
+        return os.environ.get("BENCH_INPUT", "")
+
+    def notification(self, heading, message, icon=NOTIFICATION_INFO, time=5000):
+        pass
+
+    def textviewer(self, heading, text, usemono=False):
+        pass
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Module: xbmcplugin (benchmark stub)
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+
+SORT_METHOD_NONE = 0
+SORT_METHOD_LABEL = 1
+SORT_METHOD_LABEL_IGNORE_THE = 2
+SORT_METHOD_DATE = 3
+SORT_METHOD_EPISODE = 24
+
+# (url, label, is_folder) of the listed items and resolved URLs
+items = []
+succeeded = None
+# number of items of each addDirectoryItems() call, cacheToDisc of the folder
+item_batches = []
+cache_to_disc = None
+
+
+def _load_settings():
+    """
+    Defaults from resources/settings.xml, overridden by the JSON object in
+    the BENCH_SETTINGS environment variable.
+    """
+    settings_xml = os.path.join(os.path.dirname(__file__), "..", "..", "resources", "settings.xml")
+    settings = {}
+    for setting in ElementTree.parse(settings_xml).iter("setting"):
+        if setting.get("id") is not None:
+            settings[setting.get("id")] = setting.get("default", "")
+    settings.update(json.loads(os.environ.get("BENCH_SETTINGS", "{}")))
+    return settings
+
+
+_settings = _load_settings()
+
+
+def getSetting(handle, key):
+    return _settings.get(key, "")
+
+
+def setPluginCategory(handle, category):
+    pass
+
+
+def setContent(handle, content):
+    pass
+
+
+def addDirectoryItem(handle, url, listitem, isFolder=False, totalItems=0):
+    items.append((url, listitem.label, isFolder))
+    return True
+
+
+def addDirectoryItems(handle, directory_items, totalItems=0):
+    item_batches.append(len(directory_items))
+    for (url, listitem, is_folder) in directory_items:
+        addDirectoryItem(handle, url, listitem, is_folder)
+    return True
+
+
+def addSortMethod(handle, sortMethod, label2Mask=""):
+    pass
+
+
+def endOfDirectory(handle, succeeded=True, updateListing=False, cacheToDisc=True):
+    globals()["succeeded"] = succeeded
+    globals()["cache_to_disc"] = cacheToDisc
+
+
+def setResolvedUrl(handle, succeeded, listitem):
+    items.append((listitem.path, listitem.label, False))
+    globals()["succeeded"] = succeeded
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# Module: cache
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import cPickle
+import hashlib
+import os
+import threading
+import time
+import zlib
+
+ENTRY_SUFFIX = ".entry"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+# entries not stored or revalidated for this long (seconds) are deleted
+MAX_AGE = 90 * 24 * 60 * 60
+# minimum time (seconds) between two runs of evict() started by put()
+EVICT_INTERVAL = 10 * 60
+EVICT_MARKER = "last-eviction"
+
+
+def write_atomic(filename, data):
+    """
+    Write a file under a temporary name first and rename it, so concurrent
+    readers (other plugin calls, the service) never see a partially
+    written file.
+
+    :type data: str
+    :raises IOError, OSError: if the file could not be written
+    """
+    tmp_filename = "{0}.{1}.{2}.tmp".format(filename, os.getpid(), threading.current_thread().ident)
+    with open(tmp_filename, "wb") as f:
+        f.write(data)
+    try:
+        os.rename(tmp_filename, filename)
+    except OSError:
+        # Windows does not replace existing files on rename
+        os.remove(filename)
+        os.rename(tmp_filename, filename)
+
+
+class CacheEntry:
+    # members:
+    # - data
+    # - validators (dict with "etag" / "last_modified" of the HTTP response, if any)
+    # - time (time the entry was stored or last revalidated)
+    def __init__(self, data, validators, time):
+        self.data = data
+        self.validators = validators
+        self.time = time
+
+
+class Cache:
+    """
+    On-disk cache with one file per entry. Entries are stored as compressed
+    pickles, so they may hold any data the caller has already converted
+    (e.g. model records) and are read without JSON parsing.
+
+    The modification time of an entry file is the time it was stored, its
+    access time is set on every read. When the cache grows beyond max_bytes,
+    the least recently read entries are deleted.
+    """
+    # members:
+    # - path
+    # - max_bytes
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if not os.path.isdir(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                pass
+
+    def _filename(self, key):
+        return os.path.join(self.path, hashlib.sha1(key).hexdigest() + ENTRY_SUFFIX)
+
+    def get(self, key, ttl):
+        """
+        Look up a cached entry.
+
+        :param key: cache key (usually the query URL)
+        :type key: str
+        :param ttl: maximum age of the entry in seconds, None for no limit
+        :type ttl: int
+        :return: the cached data, or None if missing or expired
+        """
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        if ttl is not None and time.time() - entry.time > ttl:
+            return None
+        return entry.data
+
+    def get_entry(self, key):
+        """
+        Look up a cached entry regardless of its age.
+
+        :param key: cache key (usually the query URL)
+        :type key: str
+        :rtype: CacheEntry
+        """
+        filename = self._filename(key)
+        try:
+            # the modification time is the time the entry was stored (or revalidated)
+            mtime = os.path.getmtime(filename)
+            with open(filename, "rb") as f:
+                entry = cPickle.loads(zlib.decompress(f.read()))
+            # the access time is the time the entry was last used, set it
+            # explicitly as many file systems do not update it on reads
+            os.utime(filename, (time.time(), mtime))
+        except (IOError, OSError, EOFError, zlib.error, cPickle.UnpicklingError):
+            return None
+        except (AttributeError, ImportError, IndexError, KeyError, TypeError, ValueError):
+            # written by an incompatible version
+            return None
+        return CacheEntry(entry["data"], entry.get("validators"), mtime)
+
+    def put(self, key, data, validators=None):
+        """
+        Store an entry, see write_atomic().
+
+        :param key: cache key (usually the query URL)
+        :type key: str
+        :param data: picklable data (built-in types only)
+        :param validators: "etag" / "last_modified" of the HTTP response
+        :type validators: dict
+        """
+        serialized = zlib.compress(cPickle.dumps({"data": data, "validators": validators},
+                                                 cPickle.HIGHEST_PROTOCOL))
+        try:
+            write_atomic(self._filename(key), serialized)
+        except (IOError, OSError):
+            return
+        self._evict_if_due()
+
+    def touch(self, key):
+        """
+        Mark an entry as fresh again (e.g. after the server confirmed it is unchanged).
+
+        :param key: cache key (usually the query URL)
+        :type key: str
+        """
+        try:
+            os.utime(self._filename(key), None)
+        except OSError:
+            pass
+
+    def _evict_if_due(self):
+        marker = os.path.join(self.path, EVICT_MARKER)
+        try:
+            if time.time() - os.path.getmtime(marker) < EVICT_INTERVAL:
+                return
+        except OSError:
+            pass
+        try:
+            with open(marker, "wb"):
+                pass
+        except IOError:
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Delete entries older than MAX_AGE, leftovers of interrupted writes
+        and entries of older cache formats, then the least recently read
+        entries until the cache fits into max_bytes. Other files in the cache
+        directory are kept.
+        """
+        now = time.time()
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+        for name in names:
+            filename = os.path.join(self.path, name)
+            try:
+                if name.endswith(ENTRY_SUFFIX):
+                    stat = os.stat(filename)
+                    if now - stat.st_mtime > MAX_AGE:
+                        os.remove(filename)
+                    else:
+                        entries.append((stat.st_atime, stat.st_size, filename))
+                        total += stat.st_size
+                elif name.endswith(".json") or (name.endswith(".tmp") and now - os.path.getmtime(filename) > 60 * 60):
+                    os.remove(filename)
+            except OSError:
+                # removed by another process meanwhile
+                pass
+
+        entries.sort()
+        for (_, size, filename) in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# Module: dataserver
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+"""
+Resident data server of the addon service. It keeps game and highlight
+records (see Game.to_record()) in memory, so plugin calls get the data of
+a folder with one local request instead of loading and converting it.
+
+Protocol: one JSON object per line over a TCP connection to 127.0.0.1.
+Requests are {"token": ..., "method": ..., "args": [...]}, responses are
+{"result": ...} or {"error": ...}. The port and token are written to
+SERVER_FILE in the addon profile while the server is running.
+"""
+
+import SocketServer
+import collections
+import json
+import os
+import socket
+import threading
+import time
+
+import metrics
+
+SERVER_FILE = "data-server.json"
+# maximum number of memory cache entries (schedules of days and highlights of games)
+MAX_ENTRIES = 1000
+CONNECT_TIMEOUT = 0.5
+# the server may have to query the API, allow for retries
+REQUEST_TIMEOUT = 60
+
+
+class MemoryCache:
+    """
+    Least recently used values with an expiry time.
+    """
+    # members:
+    # - max_entries
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                (expires, value) = self._entries.pop(key)
+            except KeyError:
+                return None
+            if time.time() > expires:
+                return None
+            self._entries[key] = (expires, value)
+            return value
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def remove(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _RequestHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+                if request.get("token") != self.server.token:
+                    response = {"error": "invalid token"}
+                else:
+                    response = {"result": self.server.dispatch(request["method"], request.get("args", []))}
+            except (IOError, ValueError, KeyError, TypeError) as e:
+                response = {"error": "{0}: {1}".format(type(e).__name__, e)}
+            self.wfile.write(json.dumps(response) + "\n")
+
+
+class DataServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    """
+    Serves the records of gamedays and game highlights from memory. Data
+    missing from memory is loaded with the baseballhighlights module (and
+    its disk cache), which must be set up by the caller.
+    """
+    # members:
+    # - profile (addon profile directory, for SERVER_FILE)
+    # - token
+    # - cache (MemoryCache)
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, profile):
+        SocketServer.TCPServer.__init__(self, ("127.0.0.1", 0), _RequestHandler)
+        self.profile = profile
+        self.token = os.urandom(16).encode("hex")
+        self.cache = MemoryCache()
+
+    def start(self):
+        """
+        Serve requests in a background thread and publish the port.
+        """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        filename = os.path.join(self.profile, SERVER_FILE)
+        # only readable by the user, the token protects the server from other local users
+        fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+        with os.fdopen(fd, "wb") as f:
+            json.dump({"port": self.server_address[1], "token": self.token}, f)
+
+    def stop(self):
+        try:
+            os.remove(os.path.join(self.profile, SERVER_FILE))
+        except OSError:
+            pass
+        self.shutdown()
+        self.server_close()
+
+    def dispatch(self, method, args):
+        with metrics.timer("dataserver:" + method, "latency"):
+            return self._dispatch(method, args)
+
+    def _dispatch(self, method, args):
+        if method == "ping":
+            return "pong"
+        elif method == "gamedays":
+            return self.gamedays(args[0], prefetch=len(args[0]) == 1)
+        elif method == "highlights":
+            return self.highlights(*args)
+        else:
+            raise ValueError("unknown method {0}".format(method))
+
+    def gamedays(self, date_strs, prefetch=False):
+        """
+        :param date_strs: dates "YYYY-MM-DD"
+        :param prefetch: load the highlights of the games in the background
+        :return: game records of each date
+        :rtype: list of list
+        """
+        import baseballhighlights
+
+        dates = [baseballhighlights.parse_date(d) for d in date_strs]
+        records = dict((date, self.cache.get(("gameday", date))) for date in dates)
+        missing = [date for date in dates if records[date] is None]
+        if missing:
+            for gameday in baseballhighlights.get_gamedays(missing):
+                records[gameday.date] = [game.to_record() for game in gameday.games]
+                self.cache.put(("gameday", gameday.date), records[gameday.date],
+                               baseballhighlights.date_ttl(gameday.date))
+
+        if prefetch:
+            # a gameday folder was opened, the games will be opened next
+            games = [baseballhighlights.Game.from_record(r) for date in dates for r in records[date]]
+            threading.Thread(target=self.prefetch_highlights, args=(games,)).start()
+        return [records[date] for date in dates]
+
+    def highlights(self, game_id, date_str=None):
+        """
+        :param date_str: gameday "YYYY-MM-DD", for the cache lifetime (None if unknown)
+        :return: highlight records of a game, see Game.query_highlight_records()
+        :rtype: list
+        """
+        import baseballhighlights
+
+        records = self.cache.get(("highlights", str(game_id)))
+        if records is None:
+            date = baseballhighlights.parse_date(date_str) if date_str else None
+            game = baseballhighlights.Game(str(game_id), "", date)
+            records = game.query_highlight_records()
+            self.cache.put(("highlights", str(game_id)), records, game.content_ttl())
+        return records
+
+    def prefetch_highlights(self, games):
+        import baseballhighlights
+
+        games = [g for g in games if self.cache.get(("highlights", str(g.gameId))) is None]
+        baseballhighlights.prefetch_highlights(games)
+        for game in games:
+            if game.highlights:
+                self.cache.put(("highlights", str(game.gameId)), [h.to_record() for h in game.highlights],
+                               game.content_ttl())
+
+
+def _encode(value):
+    # the models hold titles as UTF-8 byte strings, which the views extend
+    # with byte string literals, so do not hand out unicode from the JSON
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    elif isinstance(value, list):
+        return [_encode(v) for v in value]
+    return value
+
+
+class DataClient:
+    """
+    Connection of a plugin call to the data server.
+    """
+    # members:
+    # - token
+    def __init__(self, port, token):
+        self.token = token
+        self._sock = socket.create_connection(("127.0.0.1", port), CONNECT_TIMEOUT)
+        self._sock.settimeout(REQUEST_TIMEOUT)
+        self._file = self._sock.makefile("rb")
+
+    def call(self, method, *args):
+        """
+        :raises IOError: if the server failed or could not answer the request
+        """
+        try:
+            self._sock.sendall(json.dumps({"token": self.token, "method": method, "args": args}) + "\n")
+            line = self._file.readline()
+        except socket.error as e:
+            raise IOError("data server: {0}".format(e))
+        if not line:
+            raise IOError("data server closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise IOError("data server: {0}".format(response["error"]))
+        return _encode(response["result"])
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+def connect(profile):
+    """
+    Connect to the data server of the addon service.
+
+    :param profile: addon profile directory
+    :type profile: str
+    :return: the connection, None if the server is not running
+    :rtype: DataClient
+    """
+    try:
+        with open(os.path.join(profile, SERVER_FILE), "rb") as f:
+            info = json.load(f)
+        return DataClient(info["port"], info["token"])
+    except (IOError, ValueError, KeyError, socket.error):
+        return None
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+# Module: httpclient
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import errno
+import httplib
+import socket
+import threading
+import time
+import urlparse
+import zlib
+
+DEFAULT_TIMEOUT = 15
+MAX_IDLE_CONNECTIONS = 4
+READ_CHUNK_SIZE = 64 * 1024
+WARM_UP_BYTES = 1024 * 1024
+USER_AGENT = "plugin.video.baseballhighlights"
+
+
+class HttpError(IOError):
+    def __init__(self, status, url):
+        IOError.__init__(self, "HTTP {0} for {1}".format(status, url))
+        self.status = status
+        self.url = url
+
+
+# socket errors of a request on an idle connection which the server has closed
+DROPPED_CONNECTION_ERRNOS = (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE)
+
+
+def is_dropped_connection(error):
+    """
+    Whether a request error means that the server had closed the (reused)
+    connection before the request, so the request can be sent again on a
+    new connection. Timeouts do not qualify.
+    """
+    if isinstance(error, socket.timeout):
+        return False
+    if isinstance(error, httplib.BadStatusLine):
+        # the server closed the connection without a response
+        return True
+    return isinstance(error, socket.error) and error.errno in DROPPED_CONNECTION_ERRNOS
+
+
+class Response:
+    # members:
+    # - url
+    # - status
+    # - headers (dict, lower-case names)
+    # - body (decoded)
+    # - ttfb (seconds until the response headers arrived)
+    def __init__(self, url, status, headers, body, ttfb):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.ttfb = ttfb
+
+
+def read_body(response):
+    """
+    Read and decompress a response body chunk by chunk, so the compressed
+    data is never held in memory as a whole.
+
+    :return: decoded body and number of bytes transferred
+    :rtype: tuple
+    """
+    encoding = response.getheader("content-encoding")
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        decompressor = zlib.decompressobj()
+    else:
+        decompressor = None
+
+    chunks = []
+    bytes_on_wire = 0
+    while True:
+        chunk = response.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        bytes_on_wire += len(chunk)
+        if decompressor is not None:
+            try:
+                chunk = decompressor.decompress(chunk)
+            except zlib.error:
+                if encoding != "deflate" or bytes_on_wire != len(chunk):
+                    raise
+                # some servers send raw deflate streams without zlib header
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                chunk = decompressor.decompress(chunk)
+        chunks.append(chunk)
+    if decompressor is not None:
+        chunks.append(decompressor.flush())
+    return "".join(chunks), bytes_on_wire
+
+
+class HttpClient:
+    """
+    Minimal HTTP/1.1 client keeping persistent connections per host and
+    requesting compressed responses. Safe to use from several threads:
+    every request checks out its own connection from the idle pool.
+    """
+    # members:
+    # - timeout
+    # - requests (number of requests sent)
+    # - connections (number of connections opened)
+    # - bytes_on_wire (response body bytes as transferred)
+    # - bytes_decoded (response body bytes after decompression)
+    # - ttfb_total (sum of time-to-first-byte over all requests)
+    # - time_total (sum of the complete request times)
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_idle=MAX_IDLE_CONNECTIONS):
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes_on_wire = 0
+            self.bytes_decoded = 0
+            self.ttfb_total = 0.0
+            self.time_total = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests,
+                    "connections": self.connections,
+                    "bytes_on_wire": self.bytes_on_wire,
+                    "bytes_decoded": self.bytes_decoded,
+                    "ttfb_total": self.ttfb_total,
+                    "time_total": self.time_total}
+
+    def _connect(self, scheme, host, port, timeout):
+        with self._lock:
+            self.connections += 1
+        if scheme == "https":
+            return httplib.HTTPSConnection(host, port, timeout=timeout)
+        else:
+            return httplib.HTTPConnection(host, port, timeout=timeout)
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        return None
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def get(self, url, headers=None, timeout=None):
+        """
+        Send a GET request, reusing an idle connection to the same host if possible.
+
+        :param url: absolute http:// or https:// URL
+        :type url: str
+        :param headers: additional request headers
+        :type headers: dict
+        :param timeout: socket timeout in seconds (default: client timeout)
+        :type timeout: float
+        :return: the response with decompressed body
+        :rtype: Response
+        """
+        parts = urlparse.urlsplit(url)
+        scheme = parts.scheme
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        if timeout is None:
+            timeout = self.timeout
+
+        request_headers = {"Accept-Encoding": "gzip, deflate",
+                           "Connection": "keep-alive",
+                           "User-Agent": USER_AGENT}
+        if headers:
+            request_headers.update(headers)
+
+        conn = self._checkout(key)
+        reused = conn is not None
+        while True:
+            if conn is None:
+                conn = self._connect(scheme, parts.hostname, port, timeout)
+            else:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+            try:
+                start = time.time()
+                conn.request("GET", path, headers=request_headers)
+                response = conn.getresponse()
+                ttfb = time.time() - start
+                (body, bytes_on_wire) = read_body(response)
+                request_time = time.time() - start
+                break
+            except (httplib.HTTPException, socket.error) as e:
+                conn.close()
+                if reused and is_dropped_connection(e):
+                    # the server dropped the idle connection, retry once on a new one
+                    conn = None
+                    reused = False
+                elif isinstance(e, httplib.HTTPException):
+                    # report protocol errors like network errors
+                    raise IOError("{0} for {1}".format(repr(e), url))
+                else:
+                    raise
+
+        response_headers = dict((k.lower(), v) for (k, v) in response.getheaders())
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+
+        with self._lock:
+            self.requests += 1
+            self.bytes_on_wire += bytes_on_wire
+            self.bytes_decoded += len(body)
+            self.ttfb_total += ttfb
+            self.time_total += request_time
+
+        return Response(url, response.status, response_headers, body, ttfb)
+
+
+def warm_up(url, num_bytes=WARM_UP_BYTES, timeout=DEFAULT_TIMEOUT):
+    """
+    Request the start of a media file and discard it, so name resolution,
+    the server connection and the CDN cache are warm when the player
+    requests it. A separate connection is used and closed afterwards, as
+    the rest of the file is not read.
+
+    :param url: absolute http:// or https:// URL
+    :type url: str
+    :param num_bytes: number of bytes to request
+    :type num_bytes: int
+    :return: number of bytes received and the seconds spent receiving them
+        (from the response headers, without the connection setup)
+    :rtype: tuple
+    :raises IOError: if the request failed or the server did not send the file
+    """
+    parts = urlparse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    if parts.scheme == "https":
+        conn = httplib.HTTPSConnection(parts.hostname, parts.port, timeout=timeout)
+    else:
+        conn = httplib.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+    received = 0
+    try:
+        conn.request("GET", path, headers={"Range": "bytes=0-{0}".format(num_bytes - 1),
+                                           "User-Agent": USER_AGENT})
+        response = conn.getresponse()
+        if response.status not in (200, 206):
+            # redirects and error pages say nothing about the media server
+            raise IOError("HTTP status {0} for {1}".format(response.status, url))
+        # the headers are in, the rest is the transfer
+        start = time.time()
+        # servers ignoring the range send the whole file, stop after num_bytes
+        while received < num_bytes:
+            chunk = response.read(min(READ_CHUNK_SIZE, num_bytes - received))
+            if not chunk:
+                break
+            received += len(chunk)
+        seconds = time.time() - start
+    except (httplib.HTTPException, socket.error) as e:
+        raise IOError("{0} for {1}".format(repr(e), url))
+    finally:
+        conn.close()
+    return (received, seconds)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the shared client instance used by all API queries.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
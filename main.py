@@ -4,21 +4,39 @@
 # Created on: 28.11.2014
 # License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
 
+import time
+_start_time = time.time()
+
+import os
 import sys
 from urllib import urlencode
 from urlparse import parse_qsl
+import xbmc
+import xbmcaddon
 import xbmcgui
 import xbmcplugin
 
 import datetime
-import dateutil.parser
-
-import baseballhighlights
+import metrics
 
 # Get the plugin url in plugin:// notation.
 _url = sys.argv[0]
 # Get the plugin handle as an integer number.
 _handle = int(sys.argv[1])
+# Get the addon profile directory (for cached API responses).
+_profile = xbmc.translatePath(xbmcaddon.Addon().getAddonInfo('profile'))
+
+# The API module is only imported by modes which need it (see lib()).
+_baseballhighlights = None
+# Connection to the data server of the addon service (see data_client()),
+# False if it is not running.
+_data_client = None
+# Download throughput estimate (see throughput_estimator()).
+_throughput = None
+# Startup timing (seconds), logged if the logTiming setting is enabled.
+_timing = {'import': time.time() - _start_time}
+# Number of items of the folder created by this call (see render_directory()).
+_num_items = 0
 
 
 def parse_bool(bool_str):
@@ -28,6 +46,189 @@ def parse_bool(bool_str):
         return False
 
 
+def lib():
+    """
+    Import the baseballhighlights module (with the HTTP and cache modules)
+    on first use, list_top() and play_video() do not need it.
+
+    :return: the baseballhighlights module
+    """
+    global _baseballhighlights
+    if _baseballhighlights is None:
+        start = time.time()
+        import baseballhighlights
+        cache_size = int(xbmcplugin.getSetting(_handle, 'cacheSize')) * 1024 * 1024
+        baseballhighlights.set_cache_dir(os.path.join(_profile, 'cache'), cache_size)
+        _baseballhighlights = baseballhighlights
+        _timing['import'] += time.time() - start
+    return _baseballhighlights
+
+
+def data_client():
+    """
+    Connect to the data server of the addon service on first use.
+
+    :return: the connection, None if the server is not running
+    :rtype: dataserver.DataClient
+    """
+    global _data_client
+    if _data_client is None:
+        import dataserver
+        _data_client = dataserver.connect(_profile) or False
+    return _data_client or None
+
+
+def remote(method, *args):
+    """
+    Request data from the data server.
+
+    :return: the result, None if the server is not running or failed
+    """
+    global _data_client
+    client = data_client()
+    if client is None:
+        return None
+    try:
+        with metrics.timer('remote:' + method, 'latency'):
+            return client.call(method, *args)
+    except (IOError, ValueError) as e:
+        # load the data directly for the rest of this call
+        xbmc.log("[plugin.video.baseballhighlights] {0}".format(e), xbmc.LOGDEBUG)
+        _data_client = False
+        return None
+
+
+def remote_gamedays(dates):
+    """
+    Gamedays from the data server, see remote().
+
+    :rtype: list of baseballhighlights.GameDay
+    """
+    records = remote("gamedays", [str(date) for date in dates])
+    if records is None:
+        return None
+    return [lib().GameDay(date, records=r) for (date, r) in zip(dates, records)]
+
+
+def throughput_estimator():
+    """
+    :rtype: playbacks.ThroughputEstimator
+    """
+    global _throughput
+    if _throughput is None:
+        import playbacks
+        _throughput = playbacks.ThroughputEstimator(os.path.join(_profile, 'throughput.json'))
+    return _throughput
+
+
+def max_bitrate():
+    """
+    :return: bitrate limit setting in kbit/s, None for no (or an invalid) limit
+    :rtype: int
+    """
+    try:
+        return int(xbmcplugin.getSetting(_handle, 'maxBitrate')) or None
+    except ValueError:
+        return None
+
+
+def select_url(highlight):
+    """
+    URL of the rendition of a highlight to play, chosen by the bitrate
+    setting and the measured download throughput.
+    """
+    prefer_hls = parse_bool(xbmcplugin.getSetting(_handle, 'preferHls'))
+    return highlight.select_url(max_bitrate(), throughput_estimator().estimate(), prefer_hls)
+
+
+def highlight_url(highlight):
+    """
+    Plugin URL playing a highlight. Its renditions are part of the URL, the
+    one to play is chosen when playing (see play_video()) without looking
+    up the highlight, as the folder may be cached.
+    """
+    import playbacks
+    params = {'mode': 'highlight', 'video': highlight.url}
+    renditions = playbacks.encode_renditions(highlight.playbacks or [])
+    if renditions:
+        params['renditions'] = renditions
+    return get_url(**params)
+
+
+def measure_throughput(url):
+    """
+    Request the start of a video (see httpclient.warm_up()) and add the
+    measured throughput to the estimate.
+    """
+    import httpclient
+
+    try:
+        (received, seconds) = httpclient.warm_up(url)
+    except IOError as e:
+        xbmc.log("[plugin.video.baseballhighlights] {0}".format(e), xbmc.LOGDEBUG)
+        return
+    throughput_estimator().add_sample(received, seconds)
+
+
+def search_index():
+    """
+    Open the local search index in the addon profile.
+
+    :rtype: searchindex.SearchIndex
+    """
+    lib()
+    import searchindex
+    return searchindex.SearchIndex(os.path.join(_profile, 'search.db'))
+
+
+def get_timing():
+    """
+    Time spent on imports, API requests and building the listing for this
+    plugin call.
+
+    :return: total, import, network, listing (seconds), requests and bytes_on_wire
+    :rtype: dict
+    """
+    timing = {'total': time.time() - _start_time, 'import': _timing['import'],
+              'network': 0.0, 'requests': 0, 'bytes_on_wire': 0}
+    if _baseballhighlights is not None:
+        stats = sys.modules['httpclient'].get_client().stats()
+        timing['network'] = stats['time_total']
+        timing['requests'] = stats['requests']
+        timing['bytes_on_wire'] = stats['bytes_on_wire']
+    timing['listing'] = timing['total'] - timing['import'] - timing['network']
+    return timing
+
+
+def log_timing(paramstring):
+    timing = get_timing()
+    xbmc.log("[plugin.video.baseballhighlights] timing for '{0}': total {1:.0f} ms, imports {2:.0f} ms, "
+             "network {3:.0f} ms ({4} requests, {5} bytes), listing {6:.0f} ms".format(
+                 paramstring, timing['total'] * 1000, timing['import'] * 1000, timing['network'] * 1000,
+                 timing['requests'], timing['bytes_on_wire'], timing['listing'] * 1000), xbmc.LOGNOTICE)
+
+
+def record_metrics(paramstring, failed=False):
+    """
+    Add the timing of this plugin call to the metrics of its mode and save
+    them with the API metrics (see metrics.flush()). The fast modes only
+    append them to the spool file (see metrics.spool()).
+    """
+    mode = dict(parse_qsl(paramstring)).get('mode', 'top')
+    scope = 'mode:' + mode
+    timing = get_timing()
+    for name in ('total', 'import', 'network', 'listing'):
+        metrics.observe(scope, name, timing[name])
+    metrics.count(scope, 'calls')
+    metrics.count(scope, 'items', _num_items)
+    if failed:
+        metrics.count(scope, 'errors')
+    if mode in ('top', 'highlight'):
+        metrics.spool(_profile)
+    else:
+        metrics.flush(_profile)
+
+
 def get_url(**kwargs):
     """
     Create a URL for calling the plugin recursively from the given set of keyword arguments.
@@ -40,16 +241,55 @@ def get_url(**kwargs):
     return '{0}?{1}'.format(_url, urlencode(kwargs))
 
 
-def get_gamedays():
-    current_date = datetime.date.today()
-    gamedays = []
-    start_end_dates = baseballhighlights.get_season_dates(current_date.year)
-    if start_end_dates is not None:
-        opening_day = start_end_dates[0]
-        while current_date >= opening_day:
-            gamedays.append(current_date)
-            current_date -= datetime.timedelta(1)
-    return gamedays
+def get_gamedays(month=None):
+    """
+    Dates with games of the current season, latest first.
+
+    :param month: only dates of this month ("YYYY-MM")
+    :type month: str
+    :return: (date, number of games) tuples
+    :rtype: list
+    """
+    index = lib().get_season_index(datetime.date.today().year)
+    return [(gameday, index.dates[str(gameday)]) for gameday in index.gamedays()
+            if month is None or str(gameday).startswith(month)]
+
+
+def get_months(gamedays):
+    """
+    :param gamedays: (date, number of games) tuples, latest first
+    :type gamedays: list
+    :return: (first day of month, number of gamedays) tuples, latest first
+    :rtype: list
+    """
+    months = []
+    for (gameday, _) in gamedays:
+        month = gameday.replace(day=1)
+        if months and months[-1][0] == month:
+            months[-1] = (month, months[-1][1] + 1)
+        else:
+            months.append((month, 1))
+    return months
+
+
+def render_directory(items, sort_method, cache_to_disc=True):
+    """
+    Add all items to the virtual folder with a single call and finish it.
+
+    :param items: (url, list_item, is_folder) tuples
+    :type items: list
+    :param sort_method: xbmcplugin.SORT_METHOD_* for the folder
+    :type sort_method: int
+    :param cache_to_disc: whether Kodi may cache the folder
+    :type cache_to_disc: bool
+    """
+    global _num_items
+    _num_items = len(items)
+    xbmcplugin.addDirectoryItems(_handle, items, len(items))
+    # Add a sort method for the virtual folder items
+    xbmcplugin.addSortMethod(_handle, sort_method)
+    # Finish creating a virtual folder.
+    xbmcplugin.endOfDirectory(_handle, cacheToDisc=cache_to_disc)
 
 
 def list_top():
@@ -63,27 +303,50 @@ def list_top():
     # for this type of content.
     xbmcplugin.setContent(_handle, 'videos')
 
+    items = []
+    list_item = xbmcgui.ListItem(label="Recent Games")
+    list_item.setInfo('video', {'title': "Recent Games", 'mediatype': 'video'})
+    url = get_url(mode='recent')
+    is_folder = True
+    items.append((url, list_item, is_folder))
+
     list_item = xbmcgui.ListItem(label="Games by Date")
     list_item.setInfo('video', {'title': "Games by Date", 'mediatype': 'video'})
     url = get_url(mode='bydate')
     is_folder = True
-    xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
+    items.append((url, list_item, is_folder))
 
     list_item = xbmcgui.ListItem(label="Games by Team")
     list_item.setInfo('video', {'title': "Games by Team", 'mediatype': 'video'})
     url = get_url(mode='byteam')
     is_folder = True
-    xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
+    items.append((url, list_item, is_folder))
 
-    # Add a sort method for the virtual folder items (alphabetically, ignore articles)
-    xbmcplugin.addSortMethod(_handle, xbmcplugin.SORT_METHOD_DATE)
-    # Finish creating a virtual folder.
-    xbmcplugin.endOfDirectory(_handle)
+    list_item = xbmcgui.ListItem(label="Search Highlights")
+    list_item.setInfo('video', {'title': "Search Highlights", 'mediatype': 'video'})
+    url = get_url(mode='search')
+    is_folder = True
+    items.append((url, list_item, is_folder))
+
+    if parse_bool(xbmcplugin.getSetting(_handle, 'collectMetrics')):
+        list_item = xbmcgui.ListItem(label="Diagnostics")
+        list_item.setInfo('video', {'title': "Diagnostics", 'mediatype': 'video'})
+        url = get_url(mode='diagnostics')
+        is_folder = True
+        items.append((url, list_item, is_folder))
 
+    render_directory(items, xbmcplugin.SORT_METHOD_DATE)
 
-def list_bydate():
+
+def list_bydate(month=None, page=0):
     """
-    Create the list of video categories in the Kodi interface.
+    Create the list of months of the current season, or the list of
+    gamedays of a month (one page at a time) in the Kodi interface.
+
+    :param month: Month in format YYYY-MM, None for the list of months
+    :type month: str
+    :param page: Page of the list of gamedays (starting with 0)
+    :type page: int
     """
     # Set plugin category. It is displayed in some skins as the name
     # of the current section.
@@ -91,11 +354,28 @@ def list_bydate():
     # Set plugin content. It allows Kodi to select appropriate views
     # for this type of content.
     xbmcplugin.setContent(_handle, 'videos')
-    # Get video categories
-    gamedays = get_gamedays()
+    items = []
+    if month is None:
+        for (first_day, num_gamedays) in get_months(get_gamedays()):
+            month_str = first_day.strftime("%Y-%m")
+            label = "{0} ({1} gamedays)".format(first_day.strftime("%B %Y"), num_gamedays)
+            list_item = xbmcgui.ListItem(label=label)
+            list_item.setInfo('video', {'title': label,
+                                        'mediatype': 'video'})
+            url = get_url(mode='bydate', month=month_str)
+            is_folder = True
+            items.append((url, list_item, is_folder))
+        # The list changes every month, so Kodi must not cache it.
+        render_directory(items, xbmcplugin.SORT_METHOD_NONE, cache_to_disc=False)
+        return
+
+    # Get video categories, only the ones of the current page are turned into list items
+    page_size = max(1, int(xbmcplugin.getSetting(_handle, 'pageSize')))
+    gamedays = get_gamedays(month)
     # Iterate through categories
-    for gameday in gamedays:
-        gameday_label = "{0}".format(gameday)
+    for (gameday, num_games) in gamedays[page * page_size:(page + 1) * page_size]:
+        gameday_str = "{0}".format(gameday)
+        gameday_label = "{0} ({1} games)".format(gameday_str, num_games)
         gameday_sort = "{:02d}.{:02d}.{:04d}".format(gameday.day, gameday.month, gameday.year)
         # Create a list item with a text label and a thumbnail image.
         list_item = xbmcgui.ListItem(label=gameday_label)
@@ -110,20 +390,28 @@ def list_bydate():
                                     'mediatype': 'video'})
         # Create a URL for a plugin recursive call.
         # Example: plugin://plugin.video.example/?action=listing&category=Animals
-        url = get_url(mode='gameday', date=gameday_label)
+        url = get_url(mode='gameday', date=gameday_str)
         # is_folder = True means that this item opens a sub-list of lower level items.
         is_folder = True
-        # Add our item to the Kodi virtual folder listing.
-        xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
-    # Add a sort method for the virtual folder items (alphabetically, ignore articles)
-    xbmcplugin.addSortMethod(_handle, xbmcplugin.SORT_METHOD_DATE)
-    # Finish creating a virtual folder.
-    xbmcplugin.endOfDirectory(_handle)
+        # Add our item to the list for the Kodi virtual folder.
+        items.append((url, list_item, is_folder))
+    if (page + 1) * page_size < len(gamedays):
+        list_item = xbmcgui.ListItem(label="Next page")
+        list_item.setInfo('video', {'title': "Next page", 'mediatype': 'video'})
+        url = get_url(mode='bydate', month=month, page=page + 1)
+        is_folder = True
+        items.append((url, list_item, is_folder))
+    # Keep the order (latest first, next page at the end). Past months do not change anymore.
+    cache_to_disc = month < datetime.date.today().strftime("%Y-%m")
+    render_directory(items, xbmcplugin.SORT_METHOD_NONE, cache_to_disc)
 
 
 def get_gameday(date_str):
-    date = dateutil.parser.parse(date_str).date()
-    return baseballhighlights.GameDay(date)
+    date = lib().parse_date(date_str)
+    gamedays = remote_gamedays([date])
+    if gamedays is not None:
+        return gamedays[0]
+    return lib().GameDay(date)
 
 
 def list_gameday(date):
@@ -141,6 +429,7 @@ def list_gameday(date):
     xbmcplugin.setContent(_handle, 'videos')
     # Get video categories
     gameday = get_gameday(date)
+    items = []
     # Iterate through categories
     for game in gameday.games:
         # Only add if there are media available
@@ -166,19 +455,76 @@ def list_gameday(date):
                                         'mediatype': 'video'})
             # Create a URL for a plugin recursive call.
             # Example: plugin://plugin.video.example/?action=listing&category=Animals
-            url = get_url(mode='game', gameId=game.gameId)
+            url = get_url(mode='game', gameId=game.gameId, title=game.title_short, date=str(game.date))
             # is_folder = True means that this item opens a sub-list of lower level items.
             is_folder = True
-            # Add our item to the Kodi virtual folder listing.
-            xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
-    # Add a sort method for the virtual folder items (alphabetically, ignore articles)
-    xbmcplugin.addSortMethod(_handle, xbmcplugin.SORT_METHOD_LABEL_IGNORE_THE)
-    # Finish creating a virtual folder.
-    xbmcplugin.endOfDirectory(_handle)
+            # Add our item to the list for the Kodi virtual folder.
+            items.append((url, list_item, is_folder))
+    # Games of past days do not change anymore, Kodi may cache the folder.
+    render_directory(items, xbmcplugin.SORT_METHOD_LABEL_IGNORE_THE, cache_to_disc=lib().is_final(gameday.date))
+    # The folder is displayed now, fetch the highlights of the games in the background
+    # (the data server does this itself).
+    if data_client() is None and parse_bool(xbmcplugin.getSetting(_handle, 'prefetchHighlights')):
+        gameday.prefetch_highlights()
+        import sqlite3
+        try:
+            index = search_index()
+            try:
+                for game in gameday.games:
+                    if game.highlights and not index.is_indexed(game.gameId):
+                        index.add_game(game)
+            finally:
+                index.close()
+        except sqlite3.OperationalError as e:
+            # e.g. locked by the service, the games are added by its next update
+            xbmc.log("[plugin.video.baseballhighlights] search index: {0}".format(e), xbmc.LOGWARNING)
+
+
+def get_recent_gamedays(days_back):
+    today = datetime.date.today()
+    dates = [today - datetime.timedelta(i) for i in range(days_back + 1)]
+    gamedays = remote_gamedays(dates)
+    if gamedays is not None:
+        return gamedays
+    return lib().get_gamedays(dates)
+
+
+def list_recent():
+    """
+    Create the list of games of the last days, latest first.
+    """
+    # Set plugin category. It is displayed in some skins as the name
+    # of the current section.
+    xbmcplugin.setPluginCategory(_handle, "Recent Games")
+    # Set plugin content. It allows Kodi to select appropriate views
+    # for this type of content.
+    xbmcplugin.setContent(_handle, 'videos')
+    show_scores = parse_bool(xbmcplugin.getSetting(_handle, 'showScores'))
+    items = []
+    # Latest day first. Days missing from the cache are queried in one request
+    # per run of consecutive days.
+    for gameday in get_recent_gamedays(int(xbmcplugin.getSetting(_handle, 'daysBack'))):
+        for game in gameday.games:
+            # Only add if there are media available
+            if game.description is not None:
+                label = game.title_time
+                if game.scores is not None and show_scores:
+                    label += " — {0}-{1}".format(game.scores[0], game.scores[1])
+                list_item = xbmcgui.ListItem(label=label)
+                list_item.setArt({'thumb': game.thumb, 'icon': game.icon, 'fanart': game.fanart})
+                list_item.setInfo('video', {'title': label,
+                                            'plot': game.description,
+                                            'plotoutline': game.description_short,
+                                            'mediatype': 'video'})
+                url = get_url(mode='game', gameId=game.gameId, title=game.title_short, date=str(game.date))
+                is_folder = True
+                items.append((url, list_item, is_folder))
+    # Keep the order of the games (latest day first), don't cache as today's games change.
+    render_directory(items, xbmcplugin.SORT_METHOD_NONE, cache_to_disc=False)
 
 
 def get_teams():
-    return baseballhighlights.get_teams()
+    return lib().get_teams()
 
 
 def list_byteam():
@@ -190,6 +536,7 @@ def list_byteam():
     xbmcplugin.setContent(_handle, 'videos')
     # Get video categories
     teams = get_teams()
+    items = []
     for team in teams:
         label = "{0} ({1})".format(team.name, team.abbreviation)
         logo = "http://www.mlbstatic.com/mlb.com/images/share/{0}.jpg".format(team.team_id)
@@ -199,17 +546,14 @@ def list_byteam():
                                     'mediatype': 'video'})
         url = get_url(mode='gamesbyteam', teamId=str(team.team_id))
         is_folder = True
-        xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
-    # Add a sort method for the virtual folder items (alphabetically, ignore articles)
-    xbmcplugin.addSortMethod(_handle, xbmcplugin.SORT_METHOD_LABEL_IGNORE_THE)
-    # Finish creating a virtual folder.
-    xbmcplugin.endOfDirectory(_handle)
+        items.append((url, list_item, is_folder))
+    render_directory(items, xbmcplugin.SORT_METHOD_LABEL_IGNORE_THE)
 
 
 def get_gamesbyteam(team_id, days_back):
     date_end = datetime.date.today()
     date_start = datetime.date.today() - datetime.timedelta(days_back)
-    return baseballhighlights.GamesByTeam(date_start, date_end, team_id)
+    return lib().GamesByTeam(date_start, date_end, team_id)
 
 
 def list_gamesbyteam(team_id):
@@ -227,6 +571,7 @@ def list_gamesbyteam(team_id):
     xbmcplugin.setContent(_handle, 'videos')
     # Get video categories
     gamesbyteam = get_gamesbyteam(team_id, int(xbmcplugin.getSetting(_handle, 'daysBack')))
+    items = []
     # Iterate through categories
     for game in gamesbyteam.games:
         # Only add if there are media available
@@ -254,32 +599,49 @@ def list_gamesbyteam(team_id):
                                         'mediatype': 'video'})
             # Create a URL for a plugin recursive call.
             # Example: plugin://plugin.video.example/?action=listing&category=Animals
-            url = get_url(mode='game', gameId=game.gameId)
+            url = get_url(mode='game', gameId=game.gameId, title=game.title_short, date=str(game.date))
             # is_folder = True means that this item opens a sub-list of lower level items.
             is_folder = True
-            # Add our item to the Kodi virtual folder listing.
-            xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
-    # Add a sort method for the virtual folder items (alphabetically, ignore articles)
-    xbmcplugin.addSortMethod(_handle, xbmcplugin.SORT_METHOD_LABEL_IGNORE_THE)
-    # Finish creating a virtual folder.
-    xbmcplugin.endOfDirectory(_handle)
+            # Add our item to the list for the Kodi virtual folder.
+            items.append((url, list_item, is_folder))
+    # The list includes today's games, so Kodi must not cache it.
+    render_directory(items, xbmcplugin.SORT_METHOD_LABEL_IGNORE_THE, cache_to_disc=False)
     
 
-def get_highlights(game_id):
-    g = baseballhighlights.Game(game_id)
-    g.get_highlights()
-    return g
+def get_game(game_id, title_short, date_str=None):
+    # With the title from the parent listing only the game content is queried,
+    # otherwise the game schedule query (which includes the highlights) is used.
+    # The date of the listing sets the cache lifetime of the content.
+    date = lib().parse_date(date_str) if date_str else None
+    return lib().Game(game_id, title_short, date)
+
+
+def iter_highlights(game):
+    """
+    Highlights of a game, from the data server unless they were included
+    in the game query.
+    """
+    if game.highlights_json is None:
+        date = game.get_date()
+        records = remote("highlights", game.gameId, str(date) if date is not None else None)
+        if records is not None:
+            return (lib().Highlight.from_record(record) for record in records)
+    return game.iter_highlights()
 
     
-def list_highlights(game_id):
+def list_highlights(game_id, title_short=None, date_str=None):
     """
     Create the list of playable videos in the Kodi interface.
 
     :param game_id: Game ID (from MLB Stats API)
     :type game_id: str
+    :param title_short: Short game title (e.g. "NYY @ BOS"), if known
+    :type title_short: str
+    :param date_str: Gameday (YYYY-MM-DD), if known
+    :type date_str: str
     """
     # Get the list of videos in the category.
-    game = get_highlights(game_id)
+    game = get_game(game_id, title_short, date_str)
     # Set plugin category. It is displayed in some skins as the name
     # of the current section.
     xbmcplugin.setPluginCategory(_handle, game.title_short)
@@ -287,13 +649,25 @@ def list_highlights(game_id):
     # for this type of content.
     xbmcplugin.setContent(_handle, 'videos')
 
+    items = []
+    highlights = list(iter_highlights(game))
+    # Highlights added since the game was shown last time are marked as new.
+    seen = lib().get_seen_highlights(game_id)
+    # Items playing the highlights one after the other, without returning to the list.
+    if len(highlights) > 1:
+        items.append(playall_item("Play all", game_id, game.title_short, date_str))
+        if any(h.contentType in ('C', 'R') for h in highlights):
+            items.append(playall_item("Play recap and condensed game", game_id, game.title_short, date_str, 'CR'))
     # Iterate through videos.
-    for (i, highlight) in enumerate(game.highlights):
+    for (i, highlight) in enumerate(highlights, len(items)):
+        label = highlight.title
+        if seen is not None and highlight.id not in seen:
+            label = "[COLOR yellow]NEW[/COLOR] " + label
         # Create a list item with a text label and a thumbnail image.
-        list_item = xbmcgui.ListItem(label=highlight.title)
+        list_item = xbmcgui.ListItem(label=label)
         # Set additional info for the list item.
         # 'mediatype' is needed for skin to display info for this ListItem correctly.
-        list_item.setInfo('video', {'title': highlight.title,
+        list_item.setInfo('video', {'title': label,
                                     'plot': highlight.description,
                                     'plotoutline': highlight.description_short,
                                     'duration': highlight.duration,
@@ -306,31 +680,241 @@ def list_highlights(game_id):
         # This is mandatory for playable items!
         list_item.setProperty('IsPlayable', 'true')
         # Create a URL for a plugin recursive call.
-        url = get_url(mode='highlight', video=highlight.url)
+        url = highlight_url(highlight)
         # Add the list item to a virtual Kodi folder.
         # is_folder = False means that this item won't open any sub-list.
         is_folder = False
-        # Add our item to the Kodi virtual folder listing.
-        xbmcplugin.addDirectoryItem(_handle, url, list_item, is_folder)
-    # Add a sort method for the virtual folder items (alphabetically, ignore articles)
-    xbmcplugin.addSortMethod(_handle, xbmcplugin.SORT_METHOD_EPISODE)
-    # Finish creating a virtual folder.
-    xbmcplugin.endOfDirectory(_handle)
+        # Add our item to the list for the Kodi virtual folder.
+        items.append((url, list_item, is_folder))
+    # Highlights of past games do not change anymore, Kodi may cache the folder.
+    cache_to_disc = game.get_date() is not None and lib().is_final(game.get_date())
+    render_directory(items, xbmcplugin.SORT_METHOD_EPISODE, cache_to_disc)
+    lib().set_seen_highlights(game_id, [h.id for h in highlights])
+    # The folder is displayed now, measure the throughput for choosing the
+    # renditions if there is no recent measurement.
+    if highlights and throughput_estimator().estimate() is None:
+        measure_throughput(highlights[0].url)
+
+
+def list_search(query=None):
+    """
+    Create the list of highlights matching a search query, from the local
+    search index (see searchindex.update_index()).
+
+    :param query: search words, asked for with the on-screen keyboard if not given
+    :type query: str
+    """
+    if query is None:
+        query = xbmcgui.Dialog().input("Search Highlights")
+        if not query:
+            xbmcplugin.endOfDirectory(_handle, succeeded=False)
+            return
+    xbmcplugin.setPluginCategory(_handle, query)
+    xbmcplugin.setContent(_handle, 'videos')
+
+    import sqlite3
+    try:
+        index = search_index()
+        try:
+            results = index.search(query.decode('utf-8'))
+        finally:
+            index.close()
+    except sqlite3.OperationalError as e:
+        # e.g. locked by the service for longer than the connection timeout
+        xbmc.log("[plugin.video.baseballhighlights] search index: {0}".format(e), xbmc.LOGWARNING)
+        xbmcgui.Dialog().notification('Baseball Highlights', 'Search index busy, try again later',
+                                      xbmcgui.NOTIFICATION_WARNING)
+        xbmcplugin.endOfDirectory(_handle, succeeded=False)
+        return
+
+    items = []
+    for (i, result) in enumerate(results):
+        highlight = result.highlight
+        label = u"{0}: {1}".format(result.title_short, highlight.title)
+        if result.datetime is not None:
+            label = u"{0} {1}".format(lib().to_local_time(result.datetime).strftime("%Y-%m-%d"), label)
+        list_item = xbmcgui.ListItem(label=label)
+        list_item.setInfo('video', {'title': label,
+                                    'plot': highlight.description,
+                                    'plotoutline': highlight.description_short,
+                                    'duration': highlight.duration,
+                                    'mediatype': 'video', 'episode': i})
+        list_item.setArt({'thumb': highlight.thumb, 'icon': highlight.icon, 'fanart': highlight.fanart})
+        list_item.setProperty('IsPlayable', 'true')
+        url = highlight_url(highlight)
+        items.append((url, list_item, False))
+    # the index grows, do not let Kodi cache the results
+    render_directory(items, xbmcplugin.SORT_METHOD_EPISODE, cache_to_disc=False)
+
+
+def playall_item(label, game_id, title_short, date_str=None, content_types=None):
+    list_item = xbmcgui.ListItem(label=label)
+    list_item.setInfo('video', {'title': label, 'mediatype': 'video'})
+    # Not 'IsPlayable': the plugin call starts the playlist itself.
+    params = {'mode': 'playall', 'gameId': game_id, 'title': title_short}
+    if date_str is not None:
+        params['date'] = date_str
+    if content_types is not None:
+        params['types'] = content_types
+    url = get_url(**params)
+    return (url, list_item, False)
+
+
+def play_all(game_id, title_short=None, content_types=None, date_str=None):
+    """
+    Play the highlights of a game as a playlist of the direct video URLs,
+    in the order of the game folder. While a clip plays, the start of the
+    next one is requested in advance (see follow_playlist()).
+
+    :param game_id: Game ID (from MLB Stats API)
+    :type game_id: str
+    :param title_short: Short game title (e.g. "NYY @ BOS"), if known
+    :type title_short: str
+    :param content_types: only play highlights of these types (e.g. "CR"), None for all
+    :type content_types: str
+    :param date_str: Gameday (YYYY-MM-DD), if known
+    :type date_str: str
+    """
+    game = get_game(game_id, title_short, date_str)
+    highlights = [h for h in iter_highlights(game) if not content_types or h.contentType in content_types]
+    if not highlights:
+        return
+
+    playlist = xbmc.PlayList(xbmc.PLAYLIST_VIDEO)
+    playlist.clear()
+    urls = [select_url(h) for h in highlights]
+    for (highlight, url) in zip(highlights, urls):
+        list_item = xbmcgui.ListItem(label=highlight.title, path=url)
+        list_item.setInfo('video', {'title': highlight.title,
+                                    'plot': highlight.description,
+                                    'plotoutline': highlight.description_short,
+                                    'duration': highlight.duration,
+                                    'mediatype': 'video'})
+        list_item.setArt({'thumb': highlight.thumb, 'icon': highlight.icon, 'fanart': highlight.fanart})
+        playlist.add(url, list_item)
+    player = xbmc.Player()
+    player.play(playlist)
+    follow_playlist(playlist, player, urls)
 
 
-def play_video(path):
+def follow_playlist(playlist, player, urls, start_timeout=20):
+    """
+    Request the start of the next clip of a playlist while the current one
+    plays, until the playback stops or the last clip is reached. The
+    requests also update the throughput estimate.
+
+    :param urls: video URLs of the playlist items
+    :type urls: list
+    :param start_timeout: seconds to wait for the playback to start
+    :type start_timeout: float
+    """
+    monitor = xbmc.Monitor()
+    warmed = set()
+    started = False
+    waited = 0
+    while len(warmed) < len(urls) - 1:
+        if player.isPlaying():
+            started = True
+        elif started or waited >= start_timeout:
+            return
+        position = playlist.getposition()
+        if started and 0 <= position < len(urls) - 1 and position + 1 not in warmed:
+            warmed.add(position + 1)
+            measure_throughput(urls[position + 1])
+        if monitor.waitForAbort(1):
+            return
+        waited += 1
+
+
+def play_video(path, renditions=None):
     """
     Play a video by the provided path.
 
     :param path: Fully-qualified video URL
     :type path: str
+    :param renditions: renditions of the video to choose from, see playbacks.encode_renditions()
+    :type renditions: str
     """
+    if renditions:
+        # If the renditions are invalid, the listed URL is played.
+        import playbacks
+        try:
+            prefer_hls = parse_bool(xbmcplugin.getSetting(_handle, 'preferHls'))
+            rendition = playbacks.select_rendition(playbacks.decode_renditions(renditions), max_bitrate(),
+                                                   throughput_estimator().estimate(), prefer_hls)
+            if rendition is not None:
+                path = rendition[0]
+        except (IOError, ValueError, KeyError) as e:
+            xbmc.log("[plugin.video.baseballhighlights] {0}".format(e), xbmc.LOGWARNING)
     # Create a playable item with a path to play.
     play_item = xbmcgui.ListItem(path=path)
     # Pass the item to the Kodi player.
     xbmcplugin.setResolvedUrl(_handle, True, listitem=play_item)
 
 
+def list_diagnostics():
+    """
+    Create the list of performance metrics of the last days (see
+    metrics.load()): p50 / p95 of the durations of API requests, plugin
+    modes and data server calls, and the counters of requests, bytes,
+    cache hits and converted objects.
+    """
+    xbmcplugin.setPluginCategory(_handle, 'Diagnostics')
+    summary = metrics.load(_profile).summary()
+
+    items = []
+    list_item = xbmcgui.ListItem(label="Export as JSON")
+    url = get_url(mode='diagnostics', export=1)
+    items.append((url, list_item, False))
+
+    # selecting a metric shows its details
+    for h in summary['histograms']:
+        label = "{0} {1}: p50 {2:.1f} ms, p95 {3:.1f} ms, mean {4:.1f} ms ({5}x)".format(
+            h['scope'], h['name'], h['p50'], h['p95'], h['mean'], h['count'])
+        url = get_url(mode='diagnostics', scope=h['scope'], name=h['name'])
+        items.append((url, xbmcgui.ListItem(label=label), False))
+    for c in summary['counters']:
+        label = "{0} {1}: {2}".format(c['scope'], c['name'], c['value'])
+        url = get_url(mode='diagnostics', scope=c['scope'], name=c['name'])
+        items.append((url, xbmcgui.ListItem(label=label), False))
+    # the metrics change with every plugin call
+    render_directory(items, xbmcplugin.SORT_METHOD_NONE, cache_to_disc=False)
+
+
+def show_metric(scope, name):
+    """
+    Show a metric of the diagnostics (see list_diagnostics()) in a text
+    dialog: the distribution of a histogram or the value of a counter.
+    """
+    aggregates = metrics.load(_profile)
+    histogram = aggregates.histograms.get((scope, name))
+    if histogram is not None:
+        lines = ["{0} measurements, mean {1:.1f} ms, max {2:.1f} ms".format(
+            histogram.count, histogram.mean() or 0.0, histogram.max), ""]
+        bounds = ["<= {0} ms".format(b) for b in metrics.BUCKETS_MS] + ["> {0} ms".format(metrics.BUCKETS_MS[-1])]
+        for (bound, n) in zip(bounds, histogram.buckets):
+            if n > 0:
+                lines.append("{0}: {1}".format(bound, n))
+    else:
+        lines = ["{0}".format(aggregates.counters.get((scope, name), 0))]
+    xbmcgui.Dialog().textviewer("{0} {1}".format(scope, name), "\n".join(lines))
+
+
+def export_diagnostics():
+    """
+    Save the performance metrics (see list_diagnostics()) as JSON in the
+    addon profile.
+    """
+    import json
+    filename = os.path.join(_profile, 'metrics-export.json')
+    export = metrics.load(_profile).summary()
+    export['period_days'] = metrics.KEEP_DAYS
+    export['time'] = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(filename, 'wb') as f:
+        json.dump(export, f, indent=1, sort_keys=True)
+    xbmcgui.Dialog().notification('Baseball Highlights', 'Metrics saved to {0}'.format(filename))
+
+
 def router(paramstring):
     """
     Router function that calls other functions
@@ -344,9 +928,12 @@ def router(paramstring):
     params = dict(parse_qsl(paramstring))
     # Check the parameters passed to the plugin
     if params:
-        if params['mode'] == 'bydate':
+        if params['mode'] == 'recent':
+            # Display the list of games of the last days.
+            list_recent()
+        elif params['mode'] == 'bydate':
             # Display the list of games for a gameday.
-            list_bydate()
+            list_bydate(params.get('month'), int(params.get('page', 0)))
         elif params['mode'] == 'byteam':
             # Display the list of games for a gameday.
             list_byteam()
@@ -358,10 +945,24 @@ def router(paramstring):
             list_gamesbyteam(params['teamId'])
         elif params['mode'] == 'game':
             # Display the list of highlights for a game.
-            list_highlights(params['gameId'])
+            list_highlights(params['gameId'], params.get('title'), params.get('date'))
+        elif params['mode'] == 'search':
+            # Display the highlights matching a search query.
+            list_search(params.get('query'))
+        elif params['mode'] == 'playall':
+            # Play the highlights of a game as a playlist.
+            play_all(params['gameId'], params.get('title'), params.get('types'), params.get('date'))
+        elif params['mode'] == 'diagnostics':
+            # Display the collected performance metrics, or export them.
+            if params.get('export'):
+                export_diagnostics()
+            elif 'scope' in params:
+                show_metric(params['scope'], params['name'])
+            else:
+                list_diagnostics()
         elif params['mode'] == 'highlight':
             # Play a video from a provided URL.
-            play_video(params['video'])
+            play_video(params['video'], params.get('renditions'))
         else:
             # If the provided paramstring does not contain a supported action
             # we raise an exception. This helps to catch coding errors,
@@ -376,4 +977,16 @@ def router(paramstring):
 if __name__ == '__main__':
     # Call the router function and pass the plugin call parameters to it.
     # We use string slicing to trim the leading '?' from the plugin call paramstring
-    router(sys.argv[2][1:])
+    failed = False
+    try:
+        router(sys.argv[2][1:])
+    except IOError as e:
+        # The API could not be reached and there was no cached data to fall back to.
+        xbmc.log("[plugin.video.baseballhighlights] {0}".format(e), xbmc.LOGERROR)
+        xbmcgui.Dialog().notification('Baseball Highlights', 'MLB Stats API not reachable', xbmcgui.NOTIFICATION_ERROR)
+        xbmcplugin.endOfDirectory(_handle, succeeded=False)
+        failed = True
+    if parse_bool(xbmcplugin.getSetting(_handle, 'logTiming')):
+        log_timing(sys.argv[2][1:])
+    if parse_bool(xbmcplugin.getSetting(_handle, 'collectMetrics')):
+        record_metrics(sys.argv[2][1:], failed)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+# Module: metrics
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import datetime
+import os
+import threading
+import time
+
+METRICS_FILE = "metrics.json"
+# measurements appended by spool(), merged into METRICS_FILE by the next flush()
+SPOOL_FILE = "metrics.spool"
+# upper bounds (ms) of the histogram buckets, the last bucket has no bound
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+# days of aggregates kept in the metrics file
+KEEP_DAYS = 7
+
+
+class Histogram:
+    """
+    Distribution of durations in fixed buckets, so aggregates of many plugin
+    calls can be merged and kept in a small file.
+    """
+    # members:
+    # - count
+    # - total (sum of all durations in ms)
+    # - max (longest duration in ms)
+    # - buckets (number of durations per bucket of BUCKETS_MS)
+    def __init__(self, count=0, total=0.0, max=0.0, buckets=None):
+        self.count = count
+        self.total = total
+        self.max = max
+        self.buckets = buckets if buckets is not None else [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        for (i, bound) in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for (a, b) in zip(self.buckets, other.buckets)]
+
+    def percentile(self, p):
+        """
+        Upper bound of the bucket containing the p-th percentile (the
+        maximum for the last bucket).
+
+        :param p: percentile, 0 to 100
+        :return: duration in ms, None if empty
+        """
+        if self.count == 0:
+            return None
+        rank = p / 100.0 * self.count
+        cumulative = 0
+        for (i, n) in enumerate(self.buckets):
+            cumulative += n
+            if cumulative >= rank and n > 0:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_json(self):
+        return {"count": self.count, "total": self.total, "max": self.max, "buckets": self.buckets}
+
+    @staticmethod
+    def from_json(data):
+        return Histogram(data["count"], data["total"], data["max"], data["buckets"])
+
+
+class Aggregates:
+    """
+    Histograms and counters, keyed by scope (e.g. "endpoint:schedule",
+    "mode:gameday") and name (e.g. "latency", "cache_hit").
+    """
+    # members:
+    # - histograms (dict: (scope, name) -> Histogram)
+    # - counters (dict: (scope, name) -> number)
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+
+    def merge(self, other):
+        for (key, histogram) in other.histograms.iteritems():
+            self.histograms.setdefault(key, Histogram()).merge(histogram)
+        for (key, value) in other.counters.iteritems():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_json(self):
+        return {"histograms": dict(("|".join(k), h.to_json()) for (k, h) in self.histograms.iteritems()),
+                "counters": dict(("|".join(k), v) for (k, v) in self.counters.iteritems())}
+
+    @staticmethod
+    def from_json(data):
+        aggregates = Aggregates()
+        for (key, h) in data.get("histograms", {}).iteritems():
+            aggregates.histograms[tuple(key.split("|", 1))] = Histogram.from_json(h)
+        for (key, v) in data.get("counters", {}).iteritems():
+            aggregates.counters[tuple(key.split("|", 1))] = v
+        return aggregates
+
+    def summary(self):
+        """
+        :return: p50 / p95 / mean (ms) of each histogram and the counters,
+            sorted by scope and name
+        :rtype: dict
+        """
+        return {"histograms": [{"scope": k[0], "name": k[1], "count": h.count, "p50": h.percentile(50),
+                                "p95": h.percentile(95), "mean": h.mean()}
+                               for (k, h) in sorted(self.histograms.iteritems())],
+                "counters": [{"scope": k[0], "name": k[1], "value": v} for (k, v) in sorted(self.counters.iteritems())]}
+
+
+# measurements of this process, not yet written by flush()
+_current = Aggregates()
+_lock = threading.Lock()
+
+
+def observe(scope, name, seconds):
+    """
+    Add a duration to a histogram.
+    """
+    with _lock:
+        _current.histograms.setdefault((scope, name), Histogram()).add(seconds * 1000)
+
+
+def count(scope, name, value=1):
+    """
+    Add to a counter (requests, bytes, cache hits, objects, ...).
+    """
+    with _lock:
+        _current.counters[(scope, name)] = _current.counters.get((scope, name), 0) + value
+
+
+class timer:
+    """
+    Context manager adding the duration of a block to a histogram.
+    """
+    def __init__(self, scope, name):
+        self.scope = scope
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        observe(self.scope, self.name, time.time() - self.start)
+
+
+def _oldest_day():
+    return str(datetime.date.today() - datetime.timedelta(KEEP_DAYS - 1))
+
+
+def _read(filename):
+    """
+    :return: aggregates of each day in the metrics file, days which cannot
+        be read are left out
+    :rtype: dict: "YYYY-MM-DD" -> Aggregates
+    """
+    import json
+    try:
+        with open(filename, "rb") as f:
+            days_json = json.load(f)["days"]
+    except (IOError, ValueError, KeyError, TypeError):
+        return {}
+    days = {}
+    for (day, data) in days_json.iteritems():
+        try:
+            days[day] = Aggregates.from_json(data)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            pass
+    return days
+
+
+def _read_spool(filename):
+    """
+    :return: the measurements appended to a spool file by spool(), lines
+        which cannot be read are left out
+    :rtype: Aggregates
+    """
+    aggregates = Aggregates()
+    try:
+        with open(filename, "rb") as f:
+            lines = f.read().splitlines()
+    except IOError:
+        return aggregates
+    for line in lines:
+        fields = line.split("\t")
+        try:
+            if fields[0] == "h":
+                histogram = Histogram(int(fields[3]), float(fields[4]), float(fields[5]),
+                                      [int(n) for n in fields[6].split(",")])
+                if len(histogram.buckets) == len(BUCKETS_MS) + 1:
+                    aggregates.histograms.setdefault((fields[1], fields[2]), Histogram()).merge(histogram)
+            elif fields[0] == "c":
+                key = (fields[1], fields[2])
+                aggregates.counters[key] = aggregates.counters.get(key, 0) + int(fields[3])
+        except (IndexError, ValueError):
+            # partially written by a process which was killed
+            pass
+    return aggregates
+
+
+def _take_current():
+    global _current
+    with _lock:
+        current, _current = _current, Aggregates()
+    return current
+
+
+def spool(profile):
+    """
+    Append the measurements of this process to the spool file in the addon
+    profile. Unlike flush(), this neither reads nor parses anything, so it
+    suits the plugin modes which have to be fast.
+
+    :param profile: addon profile directory
+    :type profile: str
+    """
+    current = _take_current()
+    lines = ["h\t{0}\t{1}\t{2}\t{3!r}\t{4!r}\t{5}\n".format(scope, name, h.count, h.total, h.max,
+                                                                ",".join(str(n) for n in h.buckets))
+             for ((scope, name), h) in current.histograms.iteritems()]
+    lines.extend("c\t{0}\t{1}\t{2}\n".format(scope, name, value)
+                 for ((scope, name), value) in current.counters.iteritems())
+    if not lines:
+        return
+    try:
+        # a single short append, concurrent plugin calls do not mix their lines
+        with open(os.path.join(profile, SPOOL_FILE), "ab") as f:
+            f.write("".join(lines))
+    except IOError:
+        pass
+
+
+def flush(profile):
+    """
+    Add the measurements of this process and of the spool file (see
+    spool()) to today's aggregates in the metrics file and drop days older
+    than KEEP_DAYS. Concurrent flushes of several processes may lose the
+    measurements of one of them.
+
+    :param profile: addon profile directory
+    :type profile: str
+    """
+    import json
+    import cache
+
+    current = _take_current()
+    spool_filename = os.path.join(profile, SPOOL_FILE)
+    # spool() starts a new file while the taken one is merged
+    taken = "{0}.{1}.{2}.tmp".format(spool_filename, os.getpid(), threading.current_thread().ident)
+    try:
+        os.rename(spool_filename, taken)
+    except OSError:
+        pass
+    else:
+        current.merge(_read_spool(taken))
+        try:
+            os.remove(taken)
+        except OSError:
+            pass
+    if not current.histograms and not current.counters:
+        return
+
+    filename = os.path.join(profile, METRICS_FILE)
+    days = _read(filename)
+    days.setdefault(str(datetime.date.today()), Aggregates()).merge(current)
+    days_json = dict((day, a.to_json()) for (day, a) in days.iteritems() if day >= _oldest_day())
+    try:
+        cache.write_atomic(filename, json.dumps({"days": days_json}))
+    except (IOError, OSError):
+        pass
+
+
+def load(profile):
+    """
+    Aggregates of the last KEEP_DAYS days, including the spool file not
+    merged yet.
+
+    :param profile: addon profile directory
+    :type profile: str
+    :rtype: Aggregates
+    """
+    aggregates = _read_spool(os.path.join(profile, SPOOL_FILE))
+    for (day, day_aggregates) in _read(os.path.join(profile, METRICS_FILE)).iteritems():
+        if day >= _oldest_day():
+            aggregates.merge(day_aggregates)
+    return aggregates
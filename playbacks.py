@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Module: playbacks
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import json
+import re
+import time
+
+import cache
+
+# bitrate (kbit/s) and height of renditions whose name does not contain them
+KNOWN_RENDITIONS = {"mp4Avc": (2500, 720), "highBit": (16000, 1080)}
+_FLASH_NAME = re.compile(r"^FLASH_(\d+)K_(\d+)X(\d+)$")
+
+# share of the measured throughput a rendition may use
+THROUGHPUT_SAFETY = 0.7
+# weight of a new measurement in the throughput estimate
+THROUGHPUT_WEIGHT = 0.3
+# estimates older than this (seconds) are not used, the network may have changed
+THROUGHPUT_MAX_AGE = 24 * 60 * 60
+# smaller downloads (e.g. error pages) say little about the throughput
+MIN_SAMPLE_BYTES = 64 * 1024
+
+
+def parse_playback(playback_json):
+    """
+    Rendition of a highlight, from an entry of its "playbacks".
+
+    :return: (url, bitrate in kbit/s, height, adaptive) with bitrate and
+        height None if unknown and adaptive True for HLS streams, or None
+        if the entry has no URL
+    :rtype: tuple
+    """
+    try:
+        name = playback_json["name"]
+        url = playback_json["url"]
+    except KeyError:
+        return None
+
+    if url.split("?")[0].endswith(".m3u8") or name.startswith("HTTP_CLOUD") or name.lower().startswith("hls"):
+        return (url, None, None, True)
+    match = _FLASH_NAME.match(name)
+    if match is not None:
+        return (url, int(match.group(1)), int(match.group(3)), False)
+    (bitrate, height) = KNOWN_RENDITIONS.get(name, (None, None))
+    return (url, bitrate, height, False)
+
+
+def parse_playbacks(highlight_json):
+    """
+    All renditions of a highlight, see parse_playback().
+
+    :rtype: list of tuple
+    """
+    renditions = []
+    for playback_json in highlight_json.get("playbacks", []):
+        rendition = parse_playback(playback_json)
+        if rendition is not None:
+            renditions.append(rendition)
+    return renditions
+
+
+def select_rendition(renditions, max_bitrate=None, throughput=None, prefer_adaptive=False):
+    """
+    Choose the rendition to play: an adaptive stream if preferred (it starts
+    at a low bitrate and adapts to the connection), otherwise the highest
+    bitrate within the limit and the share of the measured throughput. If
+    no rendition fits, the one with the lowest bitrate is chosen.
+
+    :param renditions: see parse_playbacks()
+    :type renditions: list
+    :param max_bitrate: limit in kbit/s, None for no limit
+    :type max_bitrate: int
+    :param throughput: measured throughput in kbit/s, None if unknown
+    :type throughput: float
+    :param prefer_adaptive: choose an HLS stream if there is one
+    :type prefer_adaptive: bool
+    :return: the chosen rendition, None if there are none
+    :rtype: tuple
+    """
+    adaptive = [r for r in renditions if r[3]]
+    if prefer_adaptive and adaptive:
+        return adaptive[0]
+
+    progressive = sorted((r for r in renditions if not r[3] and r[1] is not None), key=lambda r: r[1])
+    if not progressive:
+        # only renditions of unknown bitrate
+        unknown = [r for r in renditions if not r[3]] + adaptive
+        return unknown[0] if unknown else None
+
+    budget = max_bitrate
+    if throughput is not None:
+        budget = min(budget or throughput, throughput * THROUGHPUT_SAFETY)
+    if budget is None:
+        return progressive[-1]
+    fitting = [r for r in progressive if r[1] <= budget]
+    if fitting:
+        return fitting[-1]
+    # not even the lowest bitrate fits, an adaptive stream can go lower
+    return adaptive[0] if adaptive else progressive[0]
+
+
+def encode_renditions(renditions):
+    """
+    The renditions select_rendition() can choose from, as a string for the
+    plugin URL of a highlight, so the video is played without looking up
+    the highlight again.
+
+    :param renditions: see parse_playbacks()
+    :type renditions: list
+    :rtype: str
+    """
+    candidates = []
+    adaptive = False
+    unknown = False
+    for (url, bitrate, height, is_adaptive) in renditions:
+        # only the first adaptive stream and the first rendition of unknown bitrate are ever chosen
+        if is_adaptive:
+            if adaptive:
+                continue
+            adaptive = True
+        elif bitrate is None:
+            if unknown:
+                continue
+            unknown = True
+        candidates.append("{0},{1},{2},{3}".format(bitrate or "", height or "", int(is_adaptive), url))
+    # URLs never contain spaces
+    return " ".join(candidates)
+
+
+def decode_renditions(renditions_str):
+    """
+    Renditions encoded with encode_renditions().
+
+    :rtype: list of tuple
+    :raises ValueError: if the string is invalid
+    """
+    renditions = []
+    for candidate in renditions_str.split():
+        (bitrate, height, adaptive, url) = candidate.split(",", 3)
+        renditions.append((url, int(bitrate) if bitrate else None, int(height) if height else None,
+                           adaptive == "1"))
+    return renditions
+
+
+class ThroughputEstimator:
+    """
+    Moving average of the download throughput measured while fetching
+    videos, kept in a file in the addon profile.
+    """
+    # members:
+    # - state_file
+    # - kbps (estimate in kbit/s, None if unknown)
+    # - updated (time of the last measurement)
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.kbps = None
+        self.updated = 0
+        try:
+            with open(state_file, "rb") as f:
+                state = json.load(f)
+            self.kbps = state["kbps"]
+            self.updated = state["updated"]
+        except (IOError, ValueError, KeyError):
+            pass
+
+    def estimate(self):
+        """
+        :return: throughput in kbit/s, None if unknown or outdated
+        :rtype: float
+        """
+        if self.kbps is None or time.time() - self.updated > THROUGHPUT_MAX_AGE:
+            return None
+        return self.kbps
+
+    def add_sample(self, num_bytes, seconds):
+        """
+        Add a measured download and save the estimate.
+        """
+        if num_bytes < MIN_SAMPLE_BYTES or seconds <= 0:
+            return
+        kbps = num_bytes * 8 / 1000.0 / seconds
+        if self.estimate() is None:
+            self.kbps = kbps
+        else:
+            self.kbps = THROUGHPUT_WEIGHT * kbps + (1 - THROUGHPUT_WEIGHT) * self.kbps
+        self.updated = time.time()
+        try:
+            cache.write_atomic(self.state_file, json.dumps({"kbps": self.kbps, "updated": self.updated}))
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Module: resilience
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import json
+import random
+import threading
+import time
+
+RETRIES = 2
+RETRY_BACKOFF = 0.5             # seconds, doubled for each further retry
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 60              # seconds
+
+
+class CircuitOpenError(IOError):
+    def __init__(self, open_until):
+        IOError.__init__(self, "API disabled after repeated failures for {0:.0f} s".format(open_until - time.time()))
+        self.open_until = open_until
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests for a while after several queries in a row
+    failed. The state can be kept in a file, so it survives the short-lived
+    plugin processes.
+    """
+    # members:
+    # - threshold (failures in a row which open the circuit)
+    # - reset_timeout (seconds the circuit stays open)
+    # - failures
+    # - open_until
+    def __init__(self, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, state_file=None):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state_file = state_file
+        self.failures = 0
+        self.open_until = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.state_file is None:
+            return
+        try:
+            with open(self.state_file, "rb") as f:
+                state = json.load(f)
+            self.failures = state["failures"]
+            self.open_until = state["open_until"]
+        except (IOError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        if self.state_file is None:
+            return
+        try:
+            with open(self.state_file, "wb") as f:
+                json.dump({"failures": self.failures, "open_until": self.open_until}, f)
+        except IOError:
+            pass
+
+    def check(self):
+        """
+        :raises CircuitOpenError: if requests are currently not allowed
+        """
+        with self._lock:
+            if time.time() < self.open_until:
+                raise CircuitOpenError(self.open_until)
+
+    def success(self):
+        with self._lock:
+            if self.failures > 0 or self.open_until > 0:
+                self.failures = 0
+                self.open_until = 0
+                self._save()
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                # after the timeout one request is let through; if it fails, the circuit opens again
+                self.open_until = time.time() + self.reset_timeout
+            self._save()
+
+
+def call_with_retries(func, retries=RETRIES, backoff=RETRY_BACKOFF, is_retryable=None, deadline=None):
+    """
+    Call a function, retrying with jittered exponential back-off if it
+    raises an IOError.
+
+    :param func: function without arguments
+    :param retries: maximum number of retries
+    :type retries: int
+    :param backoff: delay before the first retry in seconds
+    :type backoff: float
+    :param is_retryable: function deciding whether an error is worth a retry (default: all)
+    :param deadline: time (see time.time()) after which no retry is started
+    :type deadline: float
+    :return: the result of func
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except IOError as e:
+            if attempt >= retries or (is_retryable is not None and not is_retryable(e)):
+                raise
+            delay = backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            if deadline is not None and time.time() + delay >= deadline:
+                raise
+        time.sleep(delay)
+        attempt += 1
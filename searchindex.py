@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# Module: searchindex
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import calendar
+import datetime
+import json
+import re
+import sqlite3
+import threading
+
+import baseballhighlights
+
+SCHEMA_VERSION = 2
+# past days whose games are added by update_index()
+INDEX_DAYS = 31
+# time limit (seconds) for querying the highlights of new games in update_index()
+INDEX_TIME_BUDGET = 60
+MAX_RESULTS = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id INTEGER PRIMARY KEY,
+    timestamp INTEGER,
+    title TEXT,
+    title_short TEXT,
+    score_away INTEGER,
+    score_home INTEGER,
+    state TEXT
+);
+CREATE TABLE IF NOT EXISTS highlights (
+    id INTEGER PRIMARY KEY,
+    game_id INTEGER NOT NULL,
+    position INTEGER,
+    url TEXT,
+    title TEXT,
+    description TEXT,
+    description_short TEXT,
+    content_type TEXT,
+    duration INTEGER,
+    fanart TEXT,
+    thumb TEXT,
+    icon TEXT,
+    playbacks TEXT
+);
+CREATE INDEX IF NOT EXISTS highlights_game ON highlights (game_id);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS highlights_fts USING fts4 (
+    title, description, description_short, game_title
+);
+"""
+
+
+def _text(value):
+    # sqlite3 only accepts byte strings which are plain ASCII
+    if isinstance(value, str):
+        return value.decode('utf-8', 'replace')
+    return value
+
+
+class SearchResult:
+    # members:
+    # - highlight
+    # - game_id
+    # - title_short (of the game)
+    # - datetime (of the game)
+    def __init__(self, highlight, game_id, title_short, game_datetime):
+        self.highlight = highlight
+        self.game_id = game_id
+        self.title_short = title_short
+        self.datetime = game_datetime
+
+
+class SearchIndex:
+    """
+    SQLite database of games and their highlights with a full-text index,
+    for searching highlights without querying the API. If the SQLite
+    library has no FTS4 support, searches fall back to LIKE patterns.
+
+    Games are added once they are finished; games which are still running
+    are replaced on every add_game().
+    """
+    # members:
+    # - path
+    # - fts (whether the full-text index is available)
+    def __init__(self, path):
+        self.path = path
+        # several plugin calls and the service may write at the same time
+        self._db = sqlite3.connect(path, timeout=10)
+        self._lock = threading.Lock()
+        with self._db:
+            if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for table in ("highlights_fts", "highlights", "games"):
+                    self._db.execute("DROP TABLE IF EXISTS {0}".format(table))
+                self._db.execute("PRAGMA user_version = {0}".format(SCHEMA_VERSION))
+            self._db.executescript(_SCHEMA)
+        try:
+            self._db.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def close(self):
+        self._db.close()
+
+    def is_indexed(self, game_id):
+        """
+        Whether a game is finished and already in the index.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT state FROM games WHERE game_id = ?", (int(game_id),)).fetchone()
+        return row is not None and row[0] == "Final"
+
+    def add_game(self, game):
+        """
+        Add a game with its highlights (see Game.get_highlights()) to the
+        index, replacing an earlier version of the game.
+
+        :type game: baseballhighlights.Game
+        """
+        game_id = int(game.gameId)
+        timestamp = calendar.timegm(game.datetime.utctimetuple()) if game.datetime is not None else None
+        (score_away, score_home) = game.scores if game.scores is not None else (None, None)
+        game_title = _text(game.title)
+        with self._lock, self._db:
+            self._remove_game(game_id)
+            self._db.execute("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (game_id, timestamp, game_title, _text(game.title_short),
+                              score_away, score_home, game.state))
+            for (position, h) in enumerate(game.highlights):
+                cursor = self._db.execute(
+                    "INSERT INTO highlights (game_id, position, url, title, description, description_short, "
+                    "content_type, duration, fanart, thumb, icon, playbacks) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (game_id, position, h.url, _text(h.title), _text(h.description), _text(h.description_short),
+                     h.contentType, h.duration, h.fanart, h.thumb, h.icon,
+                     json.dumps(h.playbacks) if h.playbacks is not None else None))
+                if self.fts:
+                    self._db.execute("INSERT INTO highlights_fts (docid, title, description, description_short, "
+                                     "game_title) VALUES (?, ?, ?, ?, ?)",
+                                     (cursor.lastrowid, _text(h.title), _text(h.description),
+                                      _text(h.description_short), game_title))
+
+    def _remove_game(self, game_id):
+        if self.fts:
+            self._db.execute("DELETE FROM highlights_fts WHERE docid IN "
+                             "(SELECT id FROM highlights WHERE game_id = ?)", (game_id,))
+        self._db.execute("DELETE FROM highlights WHERE game_id = ?", (game_id,))
+        self._db.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+
+    def search(self, text, limit=MAX_RESULTS):
+        """
+        Find highlights whose title, descriptions or game title contain all
+        words of a query (as word prefixes), newest games first.
+
+        :param text: search query, e.g. "judge home run"
+        :type text: unicode
+        :rtype: list of SearchResult
+        """
+        words = re.findall(r"\w+", _text(text), re.UNICODE)
+        if not words:
+            return []
+
+        columns = ("h.url, h.title, h.content_type, h.description, h.description_short, h.duration, "
+                   "h.fanart, h.thumb, h.icon, h.playbacks, g.game_id, g.title_short, g.timestamp")
+        if self.fts:
+            query = ("SELECT {0} FROM highlights_fts JOIN highlights h ON h.id = highlights_fts.docid "
+                     "JOIN games g ON g.game_id = h.game_id WHERE highlights_fts MATCH ? "
+                     "ORDER BY g.timestamp DESC, h.game_id, h.position LIMIT ?").format(columns)
+            args = (u" ".join(w + u"*" for w in words), limit)
+        else:
+            condition = "(h.title LIKE ? OR h.description LIKE ? OR h.description_short LIKE ? OR g.title LIKE ?)"
+            query = ("SELECT {0} FROM highlights h JOIN games g ON g.game_id = h.game_id WHERE {1} "
+                     "ORDER BY g.timestamp DESC, h.game_id, h.position LIMIT ?").format(
+                columns, " AND ".join([condition] * len(words)))
+            args = tuple(u"%{0}%".format(w) for w in words for _ in range(4)) + (limit,)
+
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        results = []
+        for row in rows:
+            renditions = json.loads(row[9]) if row[9] is not None else None
+            highlight = baseballhighlights.Highlight.from_record(row[0:6] + (row[6:9], renditions, None, None))
+            game_datetime = datetime.datetime.fromtimestamp(row[12], baseballhighlights.utc) \
+                if row[12] is not None else None
+            results.append(SearchResult(highlight, row[10], row[11], game_datetime))
+        return results
+
+
+def update_index(index, days=INDEX_DAYS, cancel=None, time_budget=INDEX_TIME_BUDGET):
+    """
+    Add the games of the last days which are not in the index yet. The
+    schedules and highlights come from the cache where available.
+
+    :type index: SearchIndex
+    :param days: number of past days (including today)
+    :type days: int
+    :param cancel: event to stop the update early
+    :type cancel: threading.Event
+    :param time_budget: seconds for querying the highlights
+    :type time_budget: float
+    :return: number of games added
+    :rtype: int
+    """
+    today = datetime.date.today()
+    dates = [today - datetime.timedelta(i) for i in range(days)]
+    games = []
+    for gameday in baseballhighlights.get_gamedays(dates):
+        for game in gameday.games:
+            if game.title is not None and game.state in ("Live", "Final") and not index.is_indexed(game.gameId):
+                games.append(game)
+
+    baseballhighlights.prefetch_highlights(games, time_budget=time_budget, cancel=cancel)
+    added = 0
+    for game in games:
+        # games whose highlights were not queried in time are added next time
+        if game.highlights:
+            index.add_game(game)
+            added += 1
+    return added
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Module: service
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import os
+import threading
+
+import xbmc
+import xbmcaddon
+
+import baseballhighlights
+import dataserver
+import metrics
+import searchindex
+import warmup
+
+
+def log(msg):
+    xbmc.log("[plugin.video.baseballhighlights] {0}".format(msg), xbmc.LOGDEBUG)
+
+
+def watch_abort(monitor, cancel):
+    """
+    Set the cancel event as soon as Kodi shuts down, so a running refresh
+    stops early instead of being killed in the middle of a write.
+    """
+    while not monitor.waitForAbort(1):
+        if cancel.is_set():
+            return
+    cancel.set()
+
+
+def run():
+    addon = xbmcaddon.Addon()
+    profile = xbmc.translatePath(addon.getAddonInfo('profile'))
+    cache_size = int(addon.getSetting('cacheSize')) * 1024 * 1024
+    baseballhighlights.set_cache_dir(os.path.join(profile, 'cache'), cache_size)
+
+    monitor = xbmc.Monitor()
+    cancel = threading.Event()
+    watcher = threading.Thread(target=watch_abort, args=(monitor, cancel))
+    watcher.start()
+    w = warmup.Warmup()
+    index = searchindex.SearchIndex(os.path.join(profile, 'search.db'))
+    server = None
+    if addon.getSetting('dataServer') == "true":
+        server = dataserver.DataServer(profile)
+        server.start()
+    while not cancel.is_set():
+        live = False
+        if addon.getSetting('backgroundRefresh') == "true":
+            try:
+                live = w.refresh(cancel)
+                if server is not None:
+                    # the schedules and highlights in memory are outdated now
+                    for date in w.dates():
+                        server.cache.remove(("gameday", date))
+                    for game in w.games:
+                        server.cache.remove(("highlights", str(game.gameId)))
+                added = searchindex.update_index(index, cancel=cancel)
+                log("{0} games added to the search index".format(added))
+            except (IOError, ValueError) as e:
+                log("refresh failed: {0}".format(e))
+        if addon.getSetting('collectMetrics') == "true":
+            # the API requests of the refresh and the data server
+            metrics.flush(profile)
+        interval = w.next_interval(live)
+        log("next refresh in {0} s".format(interval))
+        if cancel.wait(interval):
+            break
+    cancel.set()
+    watcher.join()
+    if server is not None:
+        server.stop()
+    index.close()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Module: support
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+"""
+Helpers for the tests: the addon modules are imported with the stub xbmc
+modules of the benchmarks, and API queries are answered by the replay
+server of the benchmarks from fixtures created by the tests.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TESTS_DIR)
+BENCH_DIR = os.path.join(REPO_DIR, "benchmarks")
+sys.path[0:0] = [REPO_DIR, BENCH_DIR, os.path.join(BENCH_DIR, "stubs")]
+
+import baseballhighlights
+import httpclient
+import replay
+
+
+class CountingHandler(replay.ReplayHandler):
+    """
+    Replay handler which also records the largest number of requests
+    handled at the same time.
+    """
+    def do_GET(self):
+        server = self.server
+        with server.active_lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            replay.ReplayHandler.do_GET(self)
+        finally:
+            with server.active_lock:
+                server.active -= 1
+
+
+class ApiTestCase(unittest.TestCase):
+    """
+    Test case with a replay server standing in for the API and an empty
+    cache directory.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="test-")
+        self.fixtures_dir = os.path.join(self.tmp_dir, "fixtures")
+        os.mkdir(self.fixtures_dir)
+        self.server = replay.ReplayServer(self.fixtures_dir)
+        self.server.RequestHandlerClass = CountingHandler
+        self.server.active_lock = threading.Lock()
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.start()
+
+        self.api_url = baseballhighlights.API_URL
+        baseballhighlights.API_URL = self.server.api_url
+        baseballhighlights.set_cache_dir(os.path.join(self.tmp_dir, "cache"))
+
+    def tearDown(self):
+        self.wait_for_background()
+        # let the handlers of the idle keep-alive connections finish
+        httpclient.get_client().close()
+        self.server.shutdown()
+        self.server.server_close()
+        baseballhighlights.API_URL = self.api_url
+        baseballhighlights._cache = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def add_fixture(self, url, data, headers=None, fields=None, status=200):
+        """
+        Let the replay server answer a query.
+
+        :param url: query URL, below baseballhighlights.API_URL
+        :param data: JSON response
+        :param headers: response headers (lower-case names), e.g. "etag"
+        :param fields: field filter the query is sent with
+        :param status: HTTP status of the response
+        """
+        if fields is not None:
+            url = "{0}{1}fields={2}".format(url, "&" if "?" in url else "?", fields)
+        path = url[len("http://127.0.0.1:{0}".format(self.server.server_port)):]
+        fixture = replay.Fixture(path, status, headers or {}, json.dumps(data))
+        fixture.save(replay.fixture_filename(self.fixtures_dir, path))
+
+    def age_cache_entry(self, key, seconds):
+        """
+        Make a cache entry look as if it was stored some seconds earlier.
+        """
+        filename = baseballhighlights._cache._filename(key)
+        mtime = os.path.getmtime(filename) - seconds
+        os.utime(filename, (mtime, mtime))
+
+    def remove_fixtures(self):
+        shutil.rmtree(self.fixtures_dir)
+        os.mkdir(self.fixtures_dir)
+
+    def wait_for_background(self, timeout=5):
+        """
+        Wait until the background updates of cached data are finished.
+        """
+        deadline = time.time() + timeout
+        while baseballhighlights._revalidating and time.time() < deadline:
+            time.sleep(0.05)
+
+
+def highlight_json(highlight_id, slug="hit", date="2026-10-10T20:00:00Z"):
+    return {"id": str(highlight_id), "date": date, "slug": "{0}-{1}".format(slug, highlight_id),
+            "title": "Highlight {0}".format(highlight_id), "description": "Description", "blurb": "Blurb",
+            "duration": "00:01:30",
+            "image": {"cuts": [{"width": 1920, "src": "fanart.jpg"}, {"width": 960, "src": "thumb.jpg"},
+                               {"width": 640, "src": "icon.jpg"}]},
+            "playbacks": [{"name": "mp4Avc", "url": "http://example.com/{0}.mp4".format(highlight_id)},
+                          {"name": "FLASH_1200K_640X360", "url": "http://example.com/{0}_1200.mp4".format(highlight_id)}]}
+
+
+def content_json(game_pk, num_highlights=3):
+    """
+    Game content as returned by the content endpoint with HIGHLIGHT_FIELDS.
+    """
+    items = [highlight_json(game_pk * 100 + i) for i in range(num_highlights)]
+    return {"highlights": {"highlights": {"items": items}}}
+
+
+def game_json(game_pk, date="2026-10-10", state="Final"):
+    """
+    Game of a schedule as returned with SCHEDULE_FIELDS.
+    """
+    def team(team_id):
+        return {"team": {"id": team_id, "name": "Team {0}".format(team_id), "abbreviation": "T{0}".format(team_id)}}
+
+    return {"gamePk": game_pk, "gameDate": date + "T23:05:00Z", "status": {"abstractGameState": state},
+            "teams": {"away": team(100 + game_pk % 10), "home": team(110 + game_pk % 10)},
+            "linescore": {"teams": {"away": {"runs": 3}, "home": {"runs": 4}}},
+            "content": {"editorial": {"recap": {"mlb": {"headline": "Headline", "blurb": "Recap",
+                                                        "image": {"cuts": [{"width": 960, "src": "recap.jpg"}]}}}}}}
+
+
+def schedule_json(dates_games):
+    """
+    :param dates_games: (date "YYYY-MM-DD", list of game_json()) tuples
+    """
+    return {"dates": [{"date": date, "games": games} for (date, games) in dates_games]}
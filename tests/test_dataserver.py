@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Module: test_dataserver
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import datetime
+import json
+import os
+import shutil
+import socket
+import tempfile
+import unittest
+
+import support
+import baseballhighlights
+import dataserver
+
+DAY = datetime.date.today() - datetime.timedelta(5)
+DAY_BEFORE = DAY - datetime.timedelta(1)
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class DataServerTest(support.ApiTestCase):
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.data_server = dataserver.DataServer(self.tmp_dir)
+        self.data_server.start()
+        self.client = dataserver.connect(self.tmp_dir)
+
+    def tearDown(self):
+        self.client.close()
+        self.data_server.stop()
+        support.ApiTestCase.tearDown(self)
+
+    def test_ping(self):
+        self.assertEqual(self.client.call("ping"), "pong")
+
+    def test_invalid_token(self):
+        client = dataserver.DataClient(self.data_server.server_address[1], "invalid")
+        try:
+            self.assertRaisesRegexp(IOError, "invalid token", client.call, "ping")
+        finally:
+            client.close()
+
+    def test_unknown_method(self):
+        self.assertRaisesRegexp(IOError, "unknown method", self.client.call, "shutdown")
+
+    def test_gamedays(self):
+        self.add_fixture(baseballhighlights.schedule_url(DAY_BEFORE, DAY),
+                         support.schedule_json([(str(DAY_BEFORE), [support.game_json(10, str(DAY_BEFORE))]),
+                                                (str(DAY), [support.game_json(20, str(DAY)),
+                                                            support.game_json(21, str(DAY))])]),
+                         fields=baseballhighlights.SCHEDULE_FIELDS)
+        for _ in range(2):
+            records = self.client.call("gamedays", [str(DAY_BEFORE), str(DAY)])
+            games = [[baseballhighlights.Game.from_record(r) for r in day] for day in records]
+            self.assertEqual([[g.gameId for g in day] for day in games], [[10], [20, 21]])
+            self.assertEqual(games[1][0].title_short, "T100 @ T110")
+            self.assertIsInstance(games[1][0].title, str)
+        # the second call is answered from memory
+        self.assertEqual(self.server.requests, 1)
+
+    def test_highlights(self):
+        game = baseballhighlights.Game("10", "", DAY)
+        self.add_fixture(game.content_url(), support.content_json(10), fields=baseballhighlights.HIGHLIGHT_FIELDS)
+        for _ in range(2):
+            records = self.client.call("highlights", "10", str(DAY))
+            highlights = [baseballhighlights.Highlight.from_record(r) for r in records]
+            self.assertEqual([h.title for h in highlights], ["Highlight 1000", "Highlight 1001", "Highlight 1002"])
+            self.assertEqual(highlights[0].url, "http://example.com/1000.mp4")
+        self.assertEqual(self.server.requests, 1)
+
+    def test_api_unreachable(self):
+        game = baseballhighlights.Game("10", "", DAY)
+        self.add_fixture(game.content_url(), {}, fields=baseballhighlights.HIGHLIGHT_FIELDS, status=503)
+        self.assertRaises(IOError, self.client.call, "highlights", "10", str(DAY))
+        # the connection stays usable
+        self.assertEqual(self.client.call("ping"), "pong")
+
+
+class ConnectTest(unittest.TestCase):
+    def setUp(self):
+        self.profile = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.profile)
+
+    def test_not_running(self):
+        self.assertIsNone(dataserver.connect(self.profile))
+
+    def test_stopped(self):
+        server = dataserver.DataServer(self.profile)
+        server.start()
+        server.stop()
+        self.assertFalse(os.path.exists(os.path.join(self.profile, dataserver.SERVER_FILE)))
+        self.assertIsNone(dataserver.connect(self.profile))
+
+    def test_stale_server_file(self):
+        # left behind when Kodi was killed
+        with open(os.path.join(self.profile, dataserver.SERVER_FILE), "wb") as f:
+            json.dump({"port": closed_port(), "token": "token"}, f)
+        self.assertIsNone(dataserver.connect(self.profile))
+
+
+if __name__ == '__main__':
+    unittest.main()
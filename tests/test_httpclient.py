@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Module: test_httpclient
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import errno
+import httplib
+import json
+import socket
+import time
+import unittest
+import zlib
+
+import support
+import httpclient
+import replay
+
+DATA = {"dates": [{"date": "2026-10-10", "games": [{"gamePk": i, "title": "Game"} for i in range(50)]}]}
+
+
+class FakeResponse:
+    """
+    Response body read in slices, as httplib returns it.
+    """
+    def __init__(self, body, encoding=None):
+        self.body = body
+        self.encoding = encoding
+
+    def getheader(self, name):
+        return self.encoding if name == "content-encoding" else None
+
+    def read(self, size):
+        (chunk, self.body) = (self.body[:size], self.body[size:])
+        return chunk
+
+
+class ReadBodyTest(unittest.TestCase):
+    def setUp(self):
+        self.chunk_size = httpclient.READ_CHUNK_SIZE
+        httpclient.READ_CHUNK_SIZE = 7
+        self.body = json.dumps(DATA)
+
+    def tearDown(self):
+        httpclient.READ_CHUNK_SIZE = self.chunk_size
+
+    def compress(self, wbits):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+        return compressor.compress(self.body) + compressor.flush()
+
+    def test_plain(self):
+        self.assertEqual(httpclient.read_body(FakeResponse(self.body)), (self.body, len(self.body)))
+
+    def test_gzip(self):
+        compressed = self.compress(16 + zlib.MAX_WBITS)
+        self.assertEqual(httpclient.read_body(FakeResponse(compressed, "gzip")), (self.body, len(compressed)))
+
+    def test_deflate(self):
+        compressed = self.compress(zlib.MAX_WBITS)
+        self.assertEqual(httpclient.read_body(FakeResponse(compressed, "deflate")), (self.body, len(compressed)))
+
+    def test_raw_deflate(self):
+        compressed = self.compress(-zlib.MAX_WBITS)
+        self.assertEqual(httpclient.read_body(FakeResponse(compressed, "deflate")), (self.body, len(compressed)))
+
+
+class IsDroppedConnectionTest(unittest.TestCase):
+    def test_errors(self):
+        self.assertTrue(httpclient.is_dropped_connection(socket.error(errno.ECONNRESET, "reset")))
+        self.assertTrue(httpclient.is_dropped_connection(socket.error(errno.EPIPE, "broken pipe")))
+        self.assertTrue(httpclient.is_dropped_connection(httplib.BadStatusLine("''")))
+        self.assertFalse(httpclient.is_dropped_connection(socket.timeout("timed out")))
+        self.assertFalse(httpclient.is_dropped_connection(socket.error(errno.ECONNREFUSED, "refused")))
+
+
+class ClosingHandler(replay.ReplayHandler):
+    """
+    Closes the connection after each response without announcing it, as
+    servers do with idle keep-alive connections.
+    """
+    def do_GET(self):
+        replay.ReplayHandler.do_GET(self)
+        self.close_connection = 1
+
+
+class HttpClientTest(support.ApiTestCase):
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.client = httpclient.HttpClient()
+        self.url = self.server.api_url + "/schedule?sportId=1"
+        self.add_fixture(self.url, DATA)
+
+    def tearDown(self):
+        self.client.close()
+        support.ApiTestCase.tearDown(self)
+
+    def test_gzip_negotiated(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers.get("content-encoding"), "gzip")
+        self.assertEqual(json.loads(response.body), DATA)
+        stats = self.client.stats()
+        self.assertEqual(stats["bytes_decoded"], len(response.body))
+        self.assertLess(stats["bytes_on_wire"], stats["bytes_decoded"])
+
+    def test_keep_alive(self):
+        for _ in range(3):
+            self.assertEqual(json.loads(self.client.get(self.url).body), DATA)
+        stats = self.client.stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["connections"], 1)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_stats_reset(self):
+        self.client.get(self.url)
+        self.assertGreater(self.client.stats()["time_total"], 0)
+        self.client.reset_stats()
+        self.assertEqual(self.client.stats(), {"requests": 0, "connections": 0, "bytes_on_wire": 0,
+                                               "bytes_decoded": 0, "ttfb_total": 0.0, "time_total": 0.0})
+
+    def test_dropped_connection_retried(self):
+        self.server.RequestHandlerClass = ClosingHandler
+        self.client.get(self.url)
+        # let the server close the idle connection
+        time.sleep(0.1)
+        response = self.client.get(self.url)
+        self.assertEqual(json.loads(response.body), DATA)
+        stats = self.client.stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["connections"], 2)
+        self.assertEqual(self.server.requests, 2)
+
+
+class WarmUpTest(support.ApiTestCase):
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.url = self.server.api_url + "/video.mp4"
+
+    def test_received(self):
+        self.add_fixture(self.url, DATA)
+        (received, seconds) = httpclient.warm_up(self.url)
+        self.assertEqual(received, self.server.bytes_sent)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_error_status(self):
+        # the response is not read, do not wait for another request
+        self.server.RequestHandlerClass = ClosingHandler
+        self.add_fixture(self.url, {"message": "not found"}, status=404)
+        self.assertRaisesRegexp(IOError, "404", httpclient.warm_up, self.url)
+
+    def test_unreachable(self):
+        self.assertRaises(IOError, httpclient.warm_up, "http://127.0.0.1:1/video.mp4")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# Module: test_listing
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import support
+import baseballhighlights
+import dataserver
+import metrics
+import searchindex
+import xbmcplugin
+
+# main.py reads the plugin call and the profile when it is imported
+os.environ.setdefault("BENCH_PROFILE", tempfile.gettempdir())
+_argv = sys.argv
+sys.argv = ["plugin://plugin.video.baseballhighlights/", "1", ""]
+try:
+    import main
+finally:
+    sys.argv = _argv
+
+TODAY = datetime.date.today()
+PAST_DAY = TODAY - datetime.timedelta(5)
+
+
+class MainTestCase(support.ApiTestCase):
+    """
+    Test case calling the plugin modes of main.py with a new profile.
+    """
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.settings = dict(xbmcplugin._settings)
+        xbmcplugin._settings.update({"prefetchHighlights": "false", "daysBack": "1"})
+        del xbmcplugin.items[:]
+        del xbmcplugin.item_batches[:]
+        xbmcplugin.cache_to_disc = None
+
+        main._profile = os.path.join(self.tmp_dir, "profile")
+        os.mkdir(main._profile)
+        main._baseballhighlights = None
+        main._data_client = None
+        main._throughput = None
+        # a recent throughput measurement, so no video is requested
+        main.throughput_estimator().add_sample(1000000, 1.0)
+
+    def tearDown(self):
+        xbmcplugin._settings.clear()
+        xbmcplugin._settings.update(self.settings)
+        support.ApiTestCase.tearDown(self)
+
+
+class RenderDirectoryTest(MainTestCase):
+    """
+    Every view adds its items with a single addDirectoryItems() call, and
+    only views which do not change anymore may be cached by Kodi.
+    """
+    def add_gameday(self, date, game_pk):
+        self.add_fixture(baseballhighlights.schedule_url(date, date),
+                         support.schedule_json([(str(date), [support.game_json(game_pk, str(date)),
+                                                             support.game_json(game_pk + 1, str(date))])]),
+                         fields=baseballhighlights.SCHEDULE_FIELDS)
+
+    def assertDirectory(self, num_items, cache_to_disc):
+        self.assertEqual(xbmcplugin.item_batches, [num_items])
+        self.assertEqual(len(xbmcplugin.items), num_items)
+        self.assertIs(xbmcplugin.cache_to_disc, cache_to_disc)
+
+    def test_top(self):
+        main.list_top()
+        self.assertDirectory(5, True)
+
+    def test_gameday_past(self):
+        self.add_gameday(PAST_DAY, 10)
+        main.list_gameday(str(PAST_DAY))
+        self.assertDirectory(2, True)
+
+    def test_gameday_today(self):
+        self.add_gameday(TODAY, 10)
+        main.list_gameday(str(TODAY))
+        self.assertDirectory(2, False)
+
+    def test_recent(self):
+        yesterday = TODAY - datetime.timedelta(1)
+        self.add_fixture(baseballhighlights.schedule_url(yesterday, TODAY),
+                         support.schedule_json([(str(yesterday), [support.game_json(10, str(yesterday))]),
+                                                (str(TODAY), [support.game_json(20, str(TODAY))])]),
+                         fields=baseballhighlights.SCHEDULE_FIELDS)
+        main.list_recent()
+        self.assertDirectory(2, False)
+
+    def test_highlights_past(self):
+        game = baseballhighlights.Game(str(10), "T100 @ T110", PAST_DAY)
+        self.add_fixture(game.content_url(), support.content_json(10), fields=baseballhighlights.HIGHLIGHT_FIELDS)
+        main.list_highlights("10", "T100 @ T110", str(PAST_DAY))
+        # "Play all" and the highlights
+        self.assertDirectory(4, True)
+
+    def test_highlights_today(self):
+        game = baseballhighlights.Game(str(10), "T100 @ T110", TODAY)
+        self.add_fixture(game.content_url(), support.content_json(10), fields=baseballhighlights.HIGHLIGHT_FIELDS)
+        main.list_highlights("10", "T100 @ T110", str(TODAY))
+        self.assertDirectory(4, False)
+
+
+class DataServerTest(MainTestCase):
+    """
+    The views use the data server of the service if it is running, and
+    load the data themselves if it is not or fails.
+    """
+    def setUp(self):
+        MainTestCase.setUp(self)
+        self.add_fixture(baseballhighlights.schedule_url(PAST_DAY, PAST_DAY),
+                         support.schedule_json([(str(PAST_DAY), [support.game_json(10, str(PAST_DAY))])]),
+                         fields=baseballhighlights.SCHEDULE_FIELDS)
+        # prefetched by the server when the gameday is opened
+        self.add_fixture(baseballhighlights.Game("10", "").content_url(), support.content_json(10),
+                         fields=baseballhighlights.HIGHLIGHT_FIELDS)
+
+    def test_server(self):
+        server = dataserver.DataServer(main._profile)
+        server.start()
+        try:
+            main.list_gameday(str(PAST_DAY))
+            self.assertTrue(main._data_client)
+            main._data_client.close()
+        finally:
+            server.stop()
+        self.assertEqual(len(xbmcplugin.items), 1)
+
+    def test_not_running(self):
+        main.list_gameday(str(PAST_DAY))
+        self.assertIs(main._data_client, False)
+        self.assertEqual(len(xbmcplugin.items), 1)
+
+    def test_server_failed(self):
+        server = dataserver.DataServer(main._profile)
+        server.start()
+        try:
+            # the server does not accept the request
+            client = dataserver.DataClient(server.server_address[1], "invalid")
+            main._data_client = client
+            main.list_gameday(str(PAST_DAY))
+            self.assertIs(main._data_client, False)
+            client.close()
+        finally:
+            server.stop()
+        self.assertEqual(len(xbmcplugin.items), 1)
+
+
+class MetricsTest(MainTestCase):
+    def test_fast_mode_spooled(self):
+        main.record_metrics("")
+        self.assertEqual(sorted(os.listdir(main._profile)), [metrics.SPOOL_FILE, "throughput.json"])
+        main.record_metrics("mode=recent")
+        self.assertEqual(sorted(os.listdir(main._profile)), [metrics.METRICS_FILE, "throughput.json"])
+        self.assertEqual(metrics.load(main._profile).counters[("mode:top", "calls")], 1)
+
+    def test_diagnostics(self):
+        main.record_metrics("mode=recent")
+        main.list_diagnostics()
+        urls = [url for (url, _, _) in xbmcplugin.items]
+        self.assertIn(main.get_url(mode='diagnostics', scope='mode:recent', name='calls'), urls)
+        # every item calls the plugin with a valid mode
+        for url in urls:
+            main.router(url.split("?", 1)[1])
+
+
+class SearchTest(MainTestCase):
+    def test_locked_index(self):
+        def locked(index, text, limit=None):
+            raise sqlite3.OperationalError("database is locked")
+
+        search = searchindex.SearchIndex.search
+        searchindex.SearchIndex.search = locked
+        try:
+            main.list_search("judge")
+        finally:
+            searchindex.SearchIndex.search = search
+        self.assertIs(xbmcplugin.succeeded, False)
+        self.assertEqual(xbmcplugin.items, [])
+
+
+class PlayVideoTest(MainTestCase):
+    """
+    The rendition of a video is chosen from the plugin URL of the listing,
+    without querying the API or loading the game.
+    """
+    def setUp(self):
+        MainTestCase.setUp(self)
+        xbmcplugin._settings["maxBitrate"] = "1500"
+        self.playbacks = support.highlight_json(1000)["playbacks"]
+
+    def play(self, paramstring):
+        self.server.reset_stats()
+        del xbmcplugin.items[:]
+        main._baseballhighlights = None
+        main.router(paramstring)
+        self.assertEqual(self.server.requests, 0)
+        self.assertIsNone(main._baseballhighlights)
+        self.assertIs(xbmcplugin.succeeded, True)
+        return xbmcplugin.items[-1][0]
+
+    def listed_paramstring(self):
+        game = baseballhighlights.Game("10", "T100 @ T110")
+        self.add_fixture(game.content_url(), support.content_json(10), fields=baseballhighlights.HIGHLIGHT_FIELDS)
+        main.list_highlights("10", "T100 @ T110", str(PAST_DAY))
+        url = next(url for (url, _, _) in xbmcplugin.items if "mode=highlight" in url)
+        return url.split("?", 1)[1]
+
+    def test_rendition_from_listing(self):
+        self.assertEqual(self.play(self.listed_paramstring()), self.playbacks[1]["url"])
+
+    def test_throughput(self):
+        paramstring = self.listed_paramstring()
+        xbmcplugin._settings["maxBitrate"] = "0"
+        self.assertEqual(self.play(paramstring), self.playbacks[0]["url"])
+        # a slow connection: only the lowest bitrate fits
+        main.throughput_estimator().kbps = 100.0
+        self.assertEqual(self.play(paramstring), self.playbacks[1]["url"])
+
+    def test_invalid_setting(self):
+        paramstring = self.listed_paramstring()
+        xbmcplugin._settings["maxBitrate"] = "invalid"
+        # no limit
+        self.assertEqual(self.play(paramstring), self.playbacks[0]["url"])
+
+    def test_without_renditions(self):
+        path = self.playbacks[0]["url"]
+        self.assertEqual(self.play(main.urlencode({"mode": "highlight", "video": path})), path)
+
+    def test_invalid_renditions(self):
+        path = self.playbacks[0]["url"]
+        self.assertEqual(self.play(main.urlencode({"mode": "highlight", "video": path, "renditions": "2500,720"})),
+                         path)
+
+
+if __name__ == '__main__':
+    unittest.main()
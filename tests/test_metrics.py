@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Module: test_metrics
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+import metrics
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.profile = tempfile.mkdtemp()
+        metrics._take_current()
+
+    def tearDown(self):
+        shutil.rmtree(self.profile)
+
+    def record(self):
+        metrics.observe("mode:top", "total", 0.004)
+        metrics.observe("mode:top", "total", 0.030)
+        metrics.count("mode:top", "calls", 2)
+
+    def assertRecorded(self, aggregates, times=1):
+        histogram = aggregates.histograms[("mode:top", "total")]
+        self.assertEqual(histogram.count, 2 * times)
+        self.assertAlmostEqual(histogram.total, 34.0 * times)
+        self.assertEqual(histogram.max, 30.0)
+        self.assertEqual(histogram.percentile(50), 5)
+        self.assertEqual(aggregates.counters[("mode:top", "calls")], 2 * times)
+
+    def test_flush(self):
+        self.record()
+        metrics.flush(self.profile)
+        self.record()
+        metrics.flush(self.profile)
+        self.assertRecorded(metrics.load(self.profile), 2)
+        self.assertEqual(os.listdir(self.profile), [metrics.METRICS_FILE])
+
+    def test_nothing_measured(self):
+        metrics.flush(self.profile)
+        metrics.spool(self.profile)
+        self.assertEqual(os.listdir(self.profile), [])
+
+    def test_spool(self):
+        self.record()
+        metrics.spool(self.profile)
+        self.assertEqual(os.listdir(self.profile), [metrics.SPOOL_FILE])
+        # not merged yet, but shown
+        self.assertRecorded(metrics.load(self.profile))
+
+        self.record()
+        metrics.spool(self.profile)
+        metrics.flush(self.profile)
+        self.assertEqual(os.listdir(self.profile), [metrics.METRICS_FILE])
+        self.assertRecorded(metrics.load(self.profile), 2)
+
+    def test_spool_partially_written(self):
+        self.record()
+        metrics.spool(self.profile)
+        with open(os.path.join(self.profile, metrics.SPOOL_FILE), "ab") as f:
+            f.write("h\tmode:top\ttotal\t1\t5.0")
+        self.assertRecorded(metrics.load(self.profile))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Module: test_playbacks
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+import playbacks
+
+RENDITIONS = playbacks.parse_playbacks({"playbacks": [
+    {"name": "mp4Avc", "url": "http://example.com/1.mp4"},
+    {"name": "FLASH_450K_400X224", "url": "http://example.com/1_450.mp4?a=1,2"},
+    {"name": "FLASH_1200K_640X360", "url": "http://example.com/1_1200.mp4"},
+    {"name": "hlsCloud", "url": "http://example.com/1.m3u8"},
+    {"name": "HTTP_CLOUD_WIRED", "url": "http://example.com/2.m3u8"},
+    {"name": "mp4", "url": "http://example.com/1_unknown.mp4"},
+    {"name": "other", "url": "http://example.com/2_unknown.mp4"}]})
+
+
+class EncodeRenditionsTest(unittest.TestCase):
+    def test_round_trip(self):
+        decoded = playbacks.decode_renditions(playbacks.encode_renditions(RENDITIONS))
+        self.assertEqual(decoded, [r for r in RENDITIONS if r[0] not in ("http://example.com/2.m3u8",
+                                                                         "http://example.com/2_unknown.mp4")])
+
+    def test_same_selection(self):
+        decoded = playbacks.decode_renditions(playbacks.encode_renditions(RENDITIONS))
+        for max_bitrate in (None, 300, 1000, 5000):
+            for throughput in (None, 100.0, 2000.0):
+                for prefer_adaptive in (False, True):
+                    self.assertEqual(
+                        playbacks.select_rendition(decoded, max_bitrate, throughput, prefer_adaptive),
+                        playbacks.select_rendition(RENDITIONS, max_bitrate, throughput, prefer_adaptive))
+
+    def test_unknown_bitrates_only(self):
+        renditions = RENDITIONS[5:]
+        decoded = playbacks.decode_renditions(playbacks.encode_renditions(renditions))
+        self.assertEqual(playbacks.select_rendition(decoded), playbacks.select_rendition(renditions))
+
+    def test_invalid(self):
+        self.assertEqual(playbacks.decode_renditions(""), [])
+        self.assertRaises(ValueError, playbacks.decode_renditions, "2500,720")
+        self.assertRaises(ValueError, playbacks.decode_renditions, "high,720,0,http://example.com/1.mp4")
+
+
+class ThroughputEstimatorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.tmp_dir, "throughput.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_average(self):
+        estimator = playbacks.ThroughputEstimator(self.state_file)
+        self.assertIsNone(estimator.estimate())
+        estimator.add_sample(1000000, 1.0)
+        estimator.add_sample(1000000, 2.0)
+        self.assertAlmostEqual(estimator.estimate(), 0.3 * 4000 + 0.7 * 8000)
+        # saved for the next plugin call
+        self.assertAlmostEqual(playbacks.ThroughputEstimator(self.state_file).estimate(), estimator.estimate())
+        self.assertEqual(os.listdir(self.tmp_dir), ["throughput.json"])
+
+    def test_small_sample_ignored(self):
+        estimator = playbacks.ThroughputEstimator(self.state_file)
+        # e.g. an error page, received within milliseconds
+        estimator.add_sample(300, 0.2)
+        self.assertIsNone(estimator.estimate())
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_outdated(self):
+        with open(self.state_file, "wb") as f:
+            json.dump({"kbps": 5000.0, "updated": 0}, f)
+        self.assertIsNone(playbacks.ThroughputEstimator(self.state_file).estimate())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Module: test_prefetch
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import datetime
+import threading
+import time
+import unittest
+
+import support
+import baseballhighlights
+
+DATE = datetime.date.today() - datetime.timedelta(7)
+
+
+class PrefetchHighlightsTest(support.ApiTestCase):
+    def make_games(self, num_games):
+        games = []
+        for i in range(num_games):
+            game = baseballhighlights.Game(str(1000 + i), "T{0}".format(i), DATE)
+            self.add_fixture(game.content_url(), support.content_json(1000 + i),
+                             fields=baseballhighlights.HIGHLIGHT_FIELDS)
+            games.append(game)
+        return games
+
+    def test_all_games(self):
+        games = self.make_games(5)
+        baseballhighlights.prefetch_highlights(games)
+        self.assertEqual([len(g.highlights) for g in games], [3] * 5)
+        self.assertEqual(self.server.requests, 5)
+
+    def test_concurrency_limit(self):
+        self.server.latency = 0.2
+        games = self.make_games(6)
+        start = time.time()
+        baseballhighlights.prefetch_highlights(games, max_workers=2)
+        elapsed = time.time() - start
+        self.assertEqual(self.server.max_active, 2)
+        self.assertEqual(self.server.requests, 6)
+        # three rounds of two parallel queries
+        self.assertGreaterEqual(elapsed, 0.6)
+        self.assertLess(elapsed, 1.2)
+
+    def test_time_budget(self):
+        self.server.latency = 0.5
+        games = self.make_games(8)
+        start = time.time()
+        baseballhighlights.prefetch_highlights(games, max_workers=2, time_budget=0.3)
+        self.assertLess(time.time() - start, 0.45)
+        self.assertTrue(all(not g.highlights for g in games))
+        # the abandoned queries finish, but no further ones are started
+        time.sleep(0.7)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_cancel(self):
+        self.server.latency = 0.3
+        games = self.make_games(6)
+        cancel = threading.Event()
+        threading.Timer(0.1, cancel.set).start()
+        baseballhighlights.prefetch_highlights(games, max_workers=1, cancel=cancel)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(len([g for g in games if g.highlights]), 1)
+
+    def test_served_from_cache(self):
+        games = self.make_games(3)
+        baseballhighlights.prefetch_highlights(games)
+        self.server.reset_stats()
+
+        game = baseballhighlights.Game("1001", "T1", DATE)
+        game.get_highlights()
+        self.assertEqual(self.server.requests, 0)
+        self.assertEqual([h.url for h in game.highlights], [h.url for h in games[1].highlights])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Module: test_query
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import json
+import os
+import unittest
+
+import support
+import baseballhighlights
+
+
+class DecodeJsonTest(unittest.TestCase):
+    def test_without_filter(self):
+        body = json.dumps({"a": 1, "b": [{"c": 2}]})
+        self.assertEqual(baseballhighlights.decode_json(body), {"a": 1, "b": [{"c": 2}]})
+
+    def test_unused_members_dropped(self):
+        body = json.dumps({"dates": [{"date": "2026-10-16", "totalGames": 1,
+                                      "games": [{"gamePk": 1, "linescore": {"innings": []}}]}],
+                           "copyright": "..."})
+        self.assertEqual(baseballhighlights.decode_json(body, "dates,date,games,gamePk"),
+                         {"dates": [{"date": "2026-10-16", "games": [{"gamePk": 1}]}]})
+
+
+class GetJsonTest(support.ApiTestCase):
+    """
+    Revalidation of expired cache entries with conditional requests.
+    """
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.game = baseballhighlights.Game("10", "T100 @ T110")
+        self.url = self.game.content_url()
+        self.key = baseballhighlights.records_key(self.url)
+
+    def add_content(self, num_highlights, etag):
+        self.add_fixture(self.url, support.content_json(10, num_highlights), {"etag": etag},
+                         fields=baseballhighlights.HIGHLIGHT_FIELDS)
+
+    def get_records(self, refresh=False):
+        return baseballhighlights.get_json(self.url, baseballhighlights.TTL_LIVE, refresh,
+                                           baseballhighlights.HIGHLIGHT_FIELDS, baseballhighlights.content_records)
+
+    def entry_mtime(self):
+        return os.path.getmtime(baseballhighlights._cache._filename(self.key))
+
+    def test_not_modified(self):
+        self.add_content(3, '"v1"')
+        records = self.get_records()
+        self.assertEqual(len(records), 3)
+        self.age_cache_entry(self.key, 60)
+        aged_mtime = self.entry_mtime()
+
+        # same validator, a response body would be used if the API sent one
+        self.add_content(5, '"v1"')
+        bytes_sent = self.server.bytes_sent
+        self.assertEqual(self.get_records(refresh=True), records)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(self.server.bytes_sent, bytes_sent)
+        # the entry counts as fresh again
+        self.assertGreater(self.entry_mtime(), aged_mtime + 30)
+        self.assertEqual(self.get_records(), records)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_modified(self):
+        self.add_content(3, '"v1"')
+        self.get_records()
+        self.add_content(5, '"v2"')
+        records = self.get_records(refresh=True)
+        self.assertEqual(len(records), 5)
+        entry = baseballhighlights._cache.get_entry(self.key)
+        self.assertEqual(entry.data, records)
+        self.assertEqual(entry.validators["etag"], '"v2"')
+
+    def test_stale_revalidated_in_background(self):
+        self.add_content(3, '"v1"')
+        records = self.get_records()
+        self.age_cache_entry(self.key, baseballhighlights.TTL_LIVE + 60)
+        self.add_content(5, '"v2"')
+        # the stale entry is returned right away
+        self.assertEqual(self.get_records(), records)
+        self.wait_for_background()
+        self.assertEqual(len(baseballhighlights._cache.get_entry(self.key).data), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
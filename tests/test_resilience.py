@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Module: test_resilience
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import time
+import unittest
+
+import support
+import resilience
+
+
+class CallWithRetriesTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def unreachable(self):
+        self.calls += 1
+        raise IOError("unreachable")
+
+    def test_retries(self):
+        self.assertRaises(IOError, resilience.call_with_retries, self.unreachable, 2, 0.01)
+        self.assertEqual(self.calls, 3)
+
+    def test_deadline(self):
+        start = time.time()
+        self.assertRaises(IOError, resilience.call_with_retries, self.unreachable, 10, 0.1, deadline=start + 0.5)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertLess(self.calls, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Module: test_schedule
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import datetime
+import unittest
+
+import support
+import baseballhighlights
+
+TODAY = datetime.date.today()
+
+
+def day(days_back):
+    return TODAY - datetime.timedelta(days_back)
+
+
+class GetGamedaysTest(support.ApiTestCase):
+    def add_schedule(self, date_start, date_end):
+        dates_games = []
+        date = date_start
+        while date <= date_end:
+            game_pk = int(date.strftime("%Y%m%d")) * 10
+            dates_games.append((str(date), [support.game_json(game_pk, str(date))]))
+            date += datetime.timedelta(1)
+        self.add_fixture(baseballhighlights.schedule_url(date_start, date_end), support.schedule_json(dates_games),
+                         fields=baseballhighlights.SCHEDULE_FIELDS)
+
+    def add_error(self, date_start, date_end, status=503):
+        self.add_fixture(baseballhighlights.schedule_url(date_start, date_end), {},
+                         fields=baseballhighlights.SCHEDULE_FIELDS, status=status)
+
+    def schedule_key(self, date):
+        return baseballhighlights.records_key(baseballhighlights.schedule_url(date, date))
+
+    def test_date_spans(self):
+        self.assertEqual(baseballhighlights.date_spans([day(0), day(5), day(1), day(4), day(9)]),
+                         [(day(9), day(9)), (day(5), day(4)), (day(1), day(0))])
+
+    def test_range_query(self):
+        self.add_schedule(day(5), day(0))
+        dates = [day(i) for i in range(6)]
+        gamedays = baseballhighlights.get_gamedays(dates)
+        self.assertEqual([g.date for g in gamedays], dates)
+        self.assertEqual([len(g.games) for g in gamedays], [1] * 6)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_only_missing_dates_queried(self):
+        self.add_schedule(day(5), day(0))
+        dates = [day(i) for i in range(6)]
+        baseballhighlights.get_gamedays(dates)
+
+        # today's schedule expired (too long ago to be used while it is
+        # queried again), the others are still cached
+        self.age_cache_entry(self.schedule_key(day(0)),
+                             baseballhighlights.TTL_LIVE + baseballhighlights.STALE_WHILE_REVALIDATE + 1)
+        self.remove_fixtures()
+        self.add_schedule(day(0), day(0))
+        self.server.reset_stats()
+        gamedays = baseballhighlights.get_gamedays(dates)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.server.missing, [])
+        self.assertEqual([len(g.games) for g in gamedays], [1] * 6)
+
+    def test_runs_of_missing_dates(self):
+        self.add_schedule(day(5), day(0))
+        dates = [day(i) for i in range(6)]
+        baseballhighlights.get_gamedays(dates)
+
+        for i in (0, 1, 4):
+            self.age_cache_entry(self.schedule_key(day(i)), baseballhighlights.TTL_FINAL + 1)
+        self.remove_fixtures()
+        self.add_schedule(day(1), day(0))
+        self.add_schedule(day(4), day(4))
+        self.server.reset_stats()
+        baseballhighlights.get_gamedays(dates)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(self.server.missing, [])
+
+    def test_stale_schedules_used(self):
+        self.add_schedule(day(1), day(0))
+        dates = [day(0), day(1)]
+        baseballhighlights.get_gamedays(dates)
+
+        for date in dates:
+            self.age_cache_entry(self.schedule_key(date), baseballhighlights.TTL_LIVE + 60)
+        self.remove_fixtures()
+        self.add_error(day(1), day(0))
+        self.server.reset_stats()
+        gamedays = baseballhighlights.get_gamedays(dates)
+        self.assertEqual([len(g.games) for g in gamedays], [1, 1])
+        # queried again in the background
+        self.wait_for_background()
+        self.assertEqual(self.server.missing, [])
+        self.assertGreater(self.server.requests, 0)
+
+    def test_fallback_to_expired_schedules(self):
+        self.add_schedule(day(1), day(0))
+        dates = [day(0), day(1)]
+        baseballhighlights.get_gamedays(dates)
+
+        for date in dates:
+            self.age_cache_entry(self.schedule_key(date), baseballhighlights.TTL_FINAL + 1)
+        self.remove_fixtures()
+        self.add_error(day(1), day(0))
+        self.server.reset_stats()
+        gamedays = baseballhighlights.get_gamedays(dates)
+        self.assertEqual([len(g.games) for g in gamedays], [1, 1])
+        # not retried while the cached schedules are waiting
+        self.assertEqual(self.server.requests, 1)
+
+    def test_unreachable_without_cache(self):
+        self.add_error(day(1), day(0))
+        self.assertRaises(IOError, baseballhighlights.get_gamedays, [day(0), day(1)])
+
+
+class SeasonIndexTest(support.ApiTestCase):
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.year = TODAY.year
+        self.add_fixture("{0}/seasons?sportId=1&seasonId={1}".format(baseballhighlights.API_URL, self.year),
+                         {"seasons": [{"regularSeasonStartDate": str(day(3)), "regularSeasonEndDate": str(day(-3))}]})
+
+    def index_url(self, date_start):
+        return "{0}/schedule?sportId=1&startDate={1}&endDate={2}&gameType=R".format(
+            baseballhighlights.API_URL, date_start, TODAY)
+
+    def test_stored_index_used(self):
+        self.add_fixture(self.index_url(day(3)),
+                         support.schedule_json([(str(day(i)), [support.game_json(i + 10, str(day(i)))])
+                                                for i in range(3, -1, -1)]),
+                         fields=baseballhighlights.SCHEDULE_INDEX_FIELDS)
+        index = baseballhighlights.get_season_index(self.year)
+        self.assertEqual(index.gamedays(), [day(i) for i in range(4)])
+
+        index.updated -= baseballhighlights.TTL_LIVE + 1
+        index.save()
+        self.remove_fixtures()
+        self.add_fixture(self.index_url(day(1)), {}, fields=baseballhighlights.SCHEDULE_INDEX_FIELDS, status=503)
+        self.assertEqual(baseballhighlights.get_season_index(self.year).gamedays(), [day(i) for i in range(4)])
+        self.wait_for_background()
+        self.assertEqual(self.server.missing, [])
+
+    def test_unreachable_without_stored_index(self):
+        self.add_fixture(self.index_url(day(3)), {}, fields=baseballhighlights.SCHEDULE_INDEX_FIELDS, status=503)
+        self.assertRaises(IOError, baseballhighlights.get_season_index, self.year)
+
+
+if __name__ == '__main__':
+    unittest.main()
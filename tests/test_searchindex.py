@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Module: test_searchindex
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import datetime
+import os
+import threading
+
+import support
+import baseballhighlights
+import searchindex
+
+TODAY = datetime.date.today()
+YESTERDAY = TODAY - datetime.timedelta(1)
+
+
+class SearchIndexTestCase(support.ApiTestCase):
+    def setUp(self):
+        support.ApiTestCase.setUp(self)
+        self.index = searchindex.SearchIndex(os.path.join(self.tmp_dir, "search.db"))
+
+    def tearDown(self):
+        self.index.close()
+        support.ApiTestCase.tearDown(self)
+
+    def add_schedule(self, games_today, games_yesterday):
+        self.add_fixture(baseballhighlights.schedule_url(YESTERDAY, TODAY),
+                         support.schedule_json([(str(YESTERDAY), games_yesterday), (str(TODAY), games_today)]),
+                         fields=baseballhighlights.SCHEDULE_FIELDS)
+
+    def add_content(self, game_pk):
+        self.add_fixture(baseballhighlights.Game(str(game_pk), "").content_url(), support.content_json(game_pk),
+                         fields=baseballhighlights.HIGHLIGHT_FIELDS)
+
+    def games(self, states):
+        """
+        Query today's games (with the game_json() of the given states) and their highlights.
+        """
+        self.add_schedule([support.game_json(pk, str(TODAY), state) for (pk, state) in states], [])
+        for (pk, _) in states:
+            self.add_content(pk)
+        games = [g for gameday in baseballhighlights.get_gamedays([YESTERDAY, TODAY]) for g in gameday.games]
+        for game in games:
+            game.get_highlights()
+        return games
+
+
+class SearchTest(SearchIndexTestCase):
+    def assertSearch(self, text, titles):
+        self.assertEqual([r.highlight.title for r in self.index.search(text)], titles)
+
+    def check_search(self):
+        for game in self.games([(1, "Final"), (2, "Final")]):
+            self.index.add_game(game)
+        self.assertSearch(u"highlight 201", [u"Highlight 201"])
+        # word prefixes, in the order of the game folder
+        self.assertSearch(u"high 20", [u"Highlight 200", u"Highlight 201", u"Highlight 202"])
+        # the game title is searched as well
+        self.assertSearch(u"team 101", [u"Highlight 100", u"Highlight 101", u"Highlight 102"])
+        self.assertSearch(u"homerun", [])
+        self.assertSearch(u"  ", [])
+
+        result = self.index.search(u"highlight 201")[0]
+        self.assertEqual(result.game_id, 2)
+        self.assertEqual(result.title_short, u"T102 @ T112")
+        self.assertEqual(result.datetime, baseballhighlights.parse_datetime(str(TODAY) + "T23:05:00Z"))
+        self.assertEqual(result.highlight.url, "http://example.com/201.mp4")
+
+    def test_fts(self):
+        if not self.index.fts:
+            self.skipTest("SQLite without FTS4")
+        self.check_search()
+
+    def test_like_fallback(self):
+        self.index.fts = False
+        self.check_search()
+
+    def test_no_duplicates(self):
+        (final, live) = self.games([(1, "Final"), (2, "Live")])
+        for _ in range(2):
+            self.index.add_game(final)
+            self.index.add_game(live)
+        self.assertEqual(len(self.index.search(u"highlight")), 6)
+        self.assertTrue(self.index.is_indexed("1"))
+        # running games are added again
+        self.assertFalse(self.index.is_indexed("2"))
+        self.assertFalse(self.index.is_indexed("3"))
+
+
+class UpdateIndexTest(SearchIndexTestCase):
+    def setUp(self):
+        SearchIndexTestCase.setUp(self)
+        self.add_schedule([support.game_json(1, str(TODAY), "Live"), support.game_json(2, str(TODAY), "Preview")],
+                          [support.game_json(3, str(YESTERDAY), "Final")])
+        for game_pk in (1, 3):
+            self.add_content(game_pk)
+
+    def test_incremental(self):
+        self.assertEqual(searchindex.update_index(self.index, days=2), 2)
+        self.assertEqual(len(self.index.search(u"highlight")), 6)
+        self.server.reset_stats()
+        # only the running game is queried and added again
+        self.assertEqual(searchindex.update_index(self.index, days=2), 1)
+        self.assertEqual(len(self.index.search(u"highlight")), 6)
+        self.assertEqual(self.server.missing, [])
+
+    def test_cancelled(self):
+        cancel = threading.Event()
+        cancel.set()
+        self.assertEqual(searchindex.update_index(self.index, days=2, cancel=cancel), 0)
+        self.assertEqual(self.index.search(u"highlight"), [])
+        # the next update adds the games
+        self.assertEqual(searchindex.update_index(self.index, days=2), 2)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
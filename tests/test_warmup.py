@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Module: test_warmup
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import calendar
+import datetime
+import threading
+import unittest
+
+import support
+import baseballhighlights
+import service
+import warmup
+
+NOW = calendar.timegm((2026, 10, 10, 18, 0, 0))
+TODAY = datetime.date(2026, 10, 10)
+
+
+def utc_time(seconds_from_now):
+    return datetime.datetime.fromtimestamp(NOW + seconds_from_now, baseballhighlights.utc)
+
+
+class NextIntervalTest(unittest.TestCase):
+    def setUp(self):
+        self.warmup = warmup.Warmup(today=lambda: TODAY, now=lambda: NOW)
+
+    def test_dates(self):
+        self.assertEqual(self.warmup.dates(), [TODAY, datetime.date(2026, 10, 9)])
+
+    def test_live(self):
+        self.warmup.next_interval(False)
+        self.assertEqual(self.warmup.next_interval(True), warmup.MIN_INTERVAL)
+
+    def test_backoff(self):
+        intervals = [self.warmup.next_interval(False) for _ in range(8)]
+        self.assertEqual(intervals, [120, 240, 480, 960, 1920, 3600, 3600, 3600])
+        # back to the minimum as soon as a game is live
+        self.assertEqual(self.warmup.next_interval(True), warmup.MIN_INTERVAL)
+        self.assertEqual(self.warmup.next_interval(False), 120)
+
+    def test_next_game_start(self):
+        for _ in range(6):
+            self.warmup.next_interval(False)
+        self.warmup.next_start = utc_time(900)
+        self.assertEqual(self.warmup.next_interval(False), 900)
+
+    def test_next_game_start_soon(self):
+        self.warmup.next_start = utc_time(10)
+        self.assertEqual(self.warmup.next_interval(False), warmup.MIN_INTERVAL)
+
+
+class RefreshTest(support.ApiTestCase):
+    def add_gameday(self, date, games_json):
+        self.add_fixture(baseballhighlights.schedule_url(date, date),
+                         support.schedule_json([(str(date), games_json)]), fields=baseballhighlights.SCHEDULE_FIELDS)
+
+    def test_refresh(self):
+        today = datetime.date.today()
+        yesterday = today - datetime.timedelta(1)
+        live = support.game_json(1, str(today), "Live")
+        preview = support.game_json(2, str(today), "Preview")
+        self.add_gameday(today, [live, preview])
+        self.add_gameday(yesterday, [support.game_json(3, str(yesterday), "Final")])
+        for game_pk in (1, 3):
+            self.add_fixture(baseballhighlights.Game(str(game_pk), "").content_url(), support.content_json(game_pk),
+                             fields=baseballhighlights.HIGHLIGHT_FIELDS)
+
+        w = warmup.Warmup(today=lambda: today)
+        self.assertTrue(w.refresh())
+        self.assertEqual(w.next_start, baseballhighlights.parse_datetime(preview["gameDate"]))
+        self.assertEqual(sorted(g.gameId for g in w.games), [1, 3])
+        self.assertEqual(self.server.missing, [])
+        # schedules of both days and the content of the live and the finished game
+        self.assertEqual(self.server.requests, 4)
+
+    def test_cancelled(self):
+        today = datetime.date.today()
+        yesterday = today - datetime.timedelta(1)
+        self.add_gameday(today, [support.game_json(1, str(today), "Live")])
+        self.add_gameday(yesterday, [])
+        cancel = threading.Event()
+        cancel.set()
+        warmup.Warmup(today=lambda: today).refresh(cancel)
+        # no content queried after the cancel
+        self.assertEqual(self.server.requests, 2)
+
+
+class FakeMonitor:
+    def __init__(self, abort_after):
+        self.calls = 0
+        self.abort_after = abort_after
+
+    def waitForAbort(self, timeout=None):
+        self.calls += 1
+        return self.calls > self.abort_after
+
+
+class WatchAbortTest(unittest.TestCase):
+    def test_abort(self):
+        cancel = threading.Event()
+        service.watch_abort(FakeMonitor(2), cancel)
+        self.assertTrue(cancel.is_set())
+
+    def test_stopped(self):
+        cancel = threading.Event()
+        cancel.set()
+        monitor = FakeMonitor(10)
+        service.watch_abort(monitor, cancel)
+        self.assertEqual(monitor.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
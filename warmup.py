@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Module: warmup
+# Author: Peter Helbing
+# Created on: 17.10.2026
+# License: GPL v.3 https://www.gnu.org/copyleft/gpl.html
+
+import calendar
+import datetime
+import time
+
+import baseballhighlights
+
+MIN_INTERVAL = 60               # while games are live
+MAX_INTERVAL = 60 * 60          # back-off limit without live games
+
+
+class Warmup:
+    """
+    Keeps the cached schedules and game content of today and yesterday
+    up to date. Does not depend on Kodi, the service only calls refresh()
+    and waits for next_interval() seconds.
+    """
+    # members:
+    # - interval (current polling interval in seconds)
+    # - next_start (datetime of the next game not started yet, or None)
+    # - games (live and finished games of the last refresh)
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, today=datetime.date.today,
+                 now=time.time):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_start = None
+        self.games = []
+        self._today = today
+        self._now = now
+
+    def dates(self):
+        today = self._today()
+        return [today, today - datetime.timedelta(1)]
+
+    def refresh(self, cancel=None):
+        """
+        Query the schedules of today and yesterday and the content of all
+        games which are live or finished.
+
+        :param cancel: event to stop the refresh early
+        :type cancel: threading.Event
+        :return: True if any game is live
+        :rtype: bool
+        """
+        live_games = []
+        final_games = []
+        self.next_start = None
+        for date in self.dates():
+            gameday = baseballhighlights.GameDay(date, refresh=True)
+            for game in gameday.games:
+                if game.state == "Live":
+                    live_games.append(game)
+                elif game.state == "Final":
+                    final_games.append(game)
+                elif game.datetime is not None:
+                    if self.next_start is None or game.datetime < self.next_start:
+                        self.next_start = game.datetime
+
+        # new highlights appear while games are running, always query those;
+        # finished games only once their cached content expired
+        baseballhighlights.prefetch_highlights(live_games, cancel=cancel, refresh=True)
+        baseballhighlights.prefetch_highlights(final_games, cancel=cancel)
+        self.games = live_games + final_games
+        return len(live_games) > 0
+
+    def next_interval(self, live):
+        """
+        Seconds until the next refresh: the minimum interval while games are
+        live, otherwise doubled after each refresh up to the maximum, but
+        not beyond the start of the next game.
+
+        :param live: result of the last refresh()
+        :type live: bool
+        """
+        if live:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+            if self.next_start is not None:
+                until_start = calendar.timegm(self.next_start.utctimetuple()) - self._now()
+                self.interval = max(self.min_interval, min(self.interval, until_start))
+        return self.interval
+